@@ -1,17 +1,47 @@
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
 from database_manager import DatabaseManager
 
 # Get logger for this module
 logger = logging.getLogger('lineup.data_manager')
 
+# Legacy DataFrame column -> database column
+LEGACY_COLUMN_MAP = {
+    # Required legacy columns
+    'GroupID': 'group_id',
+    'Master': 'is_master',
+    'File': 'file',
+    'Path': 'path',
+    'MatchReasons': 'match_reasons',
+    'FileExists': 'file_exists',
+    'IsMaster': 'is_master',
+    # Additional fields
+    'Algorithm': 'algorithm',
+    'Name': 'name',
+    'Size': 'size_bytes',
+    'Created': 'created_date',
+    'Modified': 'modified_date',
+    'Width': 'width',
+    'Height': 'height',
+    'FileType': 'file_type',
+    'CameraMake': 'camera_make',
+    'CameraModel': 'camera_model',
+    'DateTaken': 'date_taken',
+    'QualityScore': 'quality_score',
+    'IPTCKeywords': 'iptc_keywords',
+    'IPTCCaption': 'iptc_caption',
+    'XMPKeywords': 'xmp_keywords',
+    'XMPTitle': 'xmp_title',
+    'SimilarityScore': 'similarity_score'
+}
+
 
 class DataManager:
     """Enhanced data manager with SQLite backend support for full 22-field CSV schema."""
     
-    def __init__(self, use_database: bool = True):
+    def __init__(self, use_database: bool = True, db_path: str = ".lineup_cache.db"):
         self.use_database = use_database
         self.db_manager: Optional[DatabaseManager] = None
         
@@ -21,31 +51,54 @@ class DataManager:
         self.group_ids: List[str] = []
         self.missing_files: Set[str] = set()
         
+        # Bumped whenever the underlying data is reloaded; keys the cached group list
+        self._data_version = 0
+        self._group_list_cache: Optional[Tuple[int, List[str]]] = None
+        
         if self.use_database:
-            self.db_manager = DatabaseManager()
+            self.db_manager = DatabaseManager(db_path)
             logger.info("Data manager initialized with SQLite backend")
         else:
             logger.info("Data manager initialized with legacy CSV backend")
     
-    def load_csv(self, file_path: str) -> bool:
-        """Load and parse CSV file with photo data."""
+    def load_csv(self, file_path: str, nrows: Optional[int] = None) -> bool:
+        """Load and parse CSV file with photo data, optionally only the first nrows rows."""
         try:
             logger.info(f"Starting CSV load from: {file_path}")
+            self._data_version += 1
             
             if self.use_database:
-                return self._load_csv_with_database(file_path)
+                return self._load_csv_with_database(file_path, nrows)
             else:
-                return self._load_csv_legacy(file_path)
+                return self._load_csv_legacy(file_path, nrows)
                 
         except Exception as e:
             logger.error(f"Error loading CSV: {e}", exc_info=True)
             raise
     
-    def _load_csv_with_database(self, file_path: str) -> bool:
+    def load_dataframe(self, df: pd.DataFrame) -> bool:
+        """Load photo data from an already-parsed CSV DataFrame; df itself is left unchanged."""
+        try:
+            logger.info(f"Starting DataFrame load with {len(df)} rows")
+            self._data_version += 1
+            
+            if self.use_database:
+                self.db_manager.import_dataframe(df.copy())
+                self._update_legacy_attributes()
+                logger.info("DataFrame loaded successfully using database backend")
+                return True
+            else:
+                return self._load_dataframe_legacy(df.copy())
+                
+        except Exception as e:
+            logger.error(f"Error loading DataFrame: {e}", exc_info=True)
+            raise
+    
+    def _load_csv_with_database(self, file_path: str, nrows: Optional[int] = None) -> bool:
         """Load CSV using SQLite database backend."""
         try:
             # Import data using persistent connection
-            self.db_manager.import_csv_data(file_path)
+            self.db_manager.import_csv_data(file_path, nrows=nrows)
 
             # Update legacy attributes for backward compatibility
             self._update_legacy_attributes()
@@ -57,12 +110,17 @@ class DataManager:
             logger.error(f"Error loading CSV with database: {e}", exc_info=True)
             raise
     
-    def _load_csv_legacy(self, file_path: str) -> bool:
+    def _load_csv_legacy(self, file_path: str, nrows: Optional[int] = None) -> bool:
         """Load CSV using legacy pandas backend."""
         # Read CSV file
-        self.df = pd.read_csv(file_path)
-        logger.info(f"Loaded CSV with {len(self.df)} rows and {len(self.df.columns)} columns")
-        logger.debug(f"CSV columns: {list(self.df.columns)}")
+        df = pd.read_csv(file_path, nrows=nrows)
+        logger.info(f"Loaded CSV with {len(df)} rows and {len(df.columns)} columns")
+        logger.debug(f"CSV columns: {list(df.columns)}")
+        return self._load_dataframe_legacy(df)
+    
+    def _load_dataframe_legacy(self, df: pd.DataFrame) -> bool:
+        """Validate, clean and group a CSV DataFrame (legacy method)."""
+        self.df = df
         
         # Validate required columns
         required_columns = ['GroupID', 'Master', 'File', 'Path']
@@ -83,12 +141,22 @@ class DataManager:
         logger.info(f"CSV processing complete: {len(self.groups)} groups, {len(self.missing_files)} missing files")
         return True
 
+    def reset_tables(self):
+        """Drop all loaded data while keeping the database connection open for reuse."""
+        self._data_version += 1
+        self.df = None
+        self.groups = {}
+        self.group_ids = []
+        self.missing_files = set()
+        
+        if self.use_database and self.db_manager:
+            self.db_manager.clear()
+
     def has_data(self) -> bool:
         """Check if any data has been loaded."""
         if self.use_database and self.db_manager:
             try:
-                group_list = self.db_manager.get_group_list()
-                return len(group_list) > 0
+                return len(self._get_cached_group_list()) > 0
             except Exception as e:
                 logger.error(f"Error checking database data: {e}")
                 return False
@@ -101,7 +169,8 @@ class DataManager:
             return
 
         # Get group list using persistent connection
-        self.group_ids = self.db_manager.get_group_list()
+        self._data_version += 1
+        self.group_ids = self._get_cached_group_list()
 
         # Build groups dictionary
         self.groups = {}
@@ -122,40 +191,10 @@ class DataManager:
     
     def _convert_to_legacy_format(self, db_df: pd.DataFrame) -> pd.DataFrame:
         """Convert database DataFrame to legacy format for compatibility."""
-        # Map database columns to legacy columns
+        # Map database columns to legacy columns, skipping any not selected from the database
         legacy_df = pd.DataFrame()
         
-        # Required legacy columns
-        legacy_df['GroupID'] = db_df['group_id']
-        legacy_df['Master'] = db_df['is_master']
-        legacy_df['File'] = db_df['file']
-        legacy_df['Path'] = db_df['path']
-        legacy_df['MatchReasons'] = db_df['match_reasons']
-        legacy_df['FileExists'] = db_df['file_exists']
-        legacy_df['IsMaster'] = db_df['is_master']
-        
-        # Add additional fields if available
-        optional_mappings = {
-            'Algorithm': 'algorithm',
-            'Name': 'name',
-            'Size': 'size_bytes',
-            'Created': 'created_date',
-            'Modified': 'modified_date',
-            'Width': 'width',
-            'Height': 'height',
-            'FileType': 'file_type',
-            'CameraMake': 'camera_make',
-            'CameraModel': 'camera_model',
-            'DateTaken': 'date_taken',
-            'QualityScore': 'quality_score',
-            'IPTCKeywords': 'iptc_keywords',
-            'IPTCCaption': 'iptc_caption',
-            'XMPKeywords': 'xmp_keywords',
-            'XMPTitle': 'xmp_title',
-            'SimilarityScore': 'similarity_score'
-        }
-        
-        for legacy_col, db_col in optional_mappings.items():
+        for legacy_col, db_col in LEGACY_COLUMN_MAP.items():
             if db_col in db_df.columns:
                 legacy_df[legacy_col] = db_df[db_col]
         
@@ -229,8 +268,8 @@ class DataManager:
         if not file_path or pd.isna(file_path):
             return False
         
-        path = Path(file_path)
-        exists = path.exists() and path.is_file()
+        # is_file() is False for missing paths, so one stat answers both questions
+        exists = Path(file_path).is_file()
         
         if not exists:
             self.missing_files.add(file_path)
@@ -238,26 +277,75 @@ class DataManager:
         
         return exists
     
-    def get_group(self, group_id: str) -> Optional[pd.DataFrame]:
-        """Get photos for a specific group."""
+    def get_group(self, group_id: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Get photos for a specific group, optionally only the given legacy columns."""
+        if columns is not None:
+            if not columns:
+                raise ValueError("columns must name at least one column (use None for all columns)")
+            unknown_columns = [col for col in columns if col not in LEGACY_COLUMN_MAP]
+            if unknown_columns:
+                raise ValueError(f"Unknown columns: {unknown_columns}")
+        
         if self.use_database and self.db_manager:
             try:
-                # Get only active images for the group
-                db_df = self.db_manager.get_active_images(group_id)
+                # Get only active images for the group, selecting just the needed database columns
+                db_columns = None
+                if columns is not None:
+                    db_columns = list(dict.fromkeys(LEGACY_COLUMN_MAP[col] for col in columns))
+                db_df = self.db_manager.get_active_images(group_id, columns=db_columns)
                 if not db_df.empty:
-                    return self._convert_to_legacy_format(db_df)
+                    legacy_df = self._convert_to_legacy_format(db_df)
+                    return legacy_df if columns is None else legacy_df[columns]
                 return pd.DataFrame()
             except Exception as e:
                 logger.error(f"Error getting group from database: {e}")
                 return pd.DataFrame()
         else:
-            return self.groups.get(group_id)
+            group_df = self.groups.get(group_id)
+            if group_df is None or columns is None:
+                return group_df
+            return group_df[[col for col in columns if col in group_df.columns]]
 
+    def has_group(self, group_id: str) -> bool:
+        """Check whether a group has photos, without building its DataFrame."""
+        if self.use_database and self.db_manager:
+            try:
+                return self.db_manager.has_active_images(group_id)
+            except Exception as e:
+                logger.error(f"Error checking group in database: {e}")
+                return False
+        else:
+            group_df = self.groups.get(group_id)
+            return group_df is not None and not group_df.empty
+    
+    def get_groups(self, group_ids: List[str]) -> Dict[str, pd.DataFrame]:
+        """Get photos for several groups at once, keyed by group ID."""
+        if self.use_database and self.db_manager:
+            try:
+                db_df = self.db_manager.get_active_images_for_groups(group_ids)
+                if db_df.empty:
+                    return {}
+                return {
+                    group_id: self._convert_to_legacy_format(group_df.reset_index(drop=True))
+                    for group_id, group_df in db_df.groupby('group_id', sort=False)
+                }
+            except Exception as e:
+                logger.error(f"Error getting groups from database: {e}")
+                return {}
+        else:
+            return {group_id: self.groups[group_id] for group_id in group_ids if group_id in self.groups}
+
+    def _get_cached_group_list(self) -> List[str]:
+        """Get the database group list, re-querying only after the data version changes."""
+        if self._group_list_cache is None or self._group_list_cache[0] != self._data_version:
+            self._group_list_cache = (self._data_version, self.db_manager.get_group_list())
+        return self._group_list_cache[1].copy()
+    
     def get_group_list(self) -> List[str]:
         """Get list of all group IDs."""
         if self.use_database and self.db_manager:
             try:
-                return self.db_manager.get_group_list()
+                return self._get_cached_group_list()
             except Exception as e:
                 logger.error(f"Error getting group list from database: {e}")
                 return []
@@ -289,6 +377,32 @@ class DataManager:
                 'match_reasons': group_df['MatchReasons'].iloc[0] if len(group_df) > 0 else ""
             }
 
+    def get_group_summaries(self, group_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get summary information for several groups, keyed by group ID."""
+        if self.use_database and self.db_manager:
+            try:
+                return self.db_manager.get_group_summaries(group_ids)
+            except Exception as e:
+                logger.error(f"Error getting group summaries from database: {e}")
+                return {}
+        else:
+            return {group_id: self.get_group_summary(group_id) for group_id in group_ids if group_id in self.groups}
+
+    def count_groups_with_multiple_existing_images(self) -> int:
+        """Count groups that have more than one existing image."""
+        if self.use_database and self.db_manager:
+            try:
+                return self.db_manager.count_groups_with_multiple_existing_images()
+            except Exception as e:
+                logger.error(f"Error counting multi-image groups in database: {e}")
+                return 0
+        else:
+            # Legacy implementation
+            if self.df is None:
+                return 0
+
+            return int(self.df.groupby('GroupID')['FileExists'].sum().gt(1).sum())
+
     def get_overall_summary(self) -> Dict[str, Any]:
         """Get overall summary of all data."""
         if self.use_database and self.db_manager:
@@ -407,36 +521,16 @@ class DataManager:
             return pd.DataFrame()
         
         try:
-            with self.db_manager as db:
-                cursor = db.connection.cursor()
-                
-                if field:
-                    # Search specific field
-                    sql = f"SELECT * FROM images WHERE {field} LIKE ? LIMIT ?"
-                    cursor.execute(sql, (f"%{query}%", limit))
-                else:
-                    # Search all text fields
-                    cursor.execute("""
-                        SELECT * FROM images WHERE 
-                            file LIKE ? OR name LIKE ? OR path LIKE ? OR 
-                            camera_make LIKE ? OR camera_model LIKE ? OR
-                            iptc_keywords LIKE ? OR iptc_caption LIKE ? OR
-                            xmp_keywords LIKE ? OR xmp_title LIKE ? OR
-                            match_reasons LIKE ?
-                        LIMIT ?
-                    """, tuple([f"%{query}%"] * 10 + [limit]))
-                
-                rows = cursor.fetchall()
-                if not rows:
-                    return pd.DataFrame()
-                
-                # Convert to DataFrame
-                columns = [col[0] for col in cursor.description]
-                data = [dict(row) for row in rows]
-                db_df = pd.DataFrame(data, columns=columns)
-                
-                return self._convert_to_legacy_format(db_df)
-                
+            # Use the persistent connection; closing it would discard an in-memory database
+            db = self.db_manager
+            db.ensure_connection()
+            # Search one field, or all text fields, through the full-text index
+            db_df = db.search_images(query, limit, field=field)
+            if db_df.empty:
+                return db_df
+            
+            return self._convert_to_legacy_format(db_df)
+            
         except Exception as e:
             logger.error(f"Error searching images: {e}")
             return pd.DataFrame()
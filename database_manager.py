@@ -12,10 +12,20 @@ logger = logging.getLogger('lineup.database_manager')
 class DatabaseManager:
     """Handles SQLite database operations for photo duplicate management."""
 
+    # Text columns covered by search_images
+    SEARCH_COLUMNS = (
+        'file', 'name', 'path', 'camera_make', 'camera_model',
+        'iptc_keywords', 'iptc_caption', 'xmp_keywords', 'xmp_title', 'match_reasons'
+    )
+
+    # Bound parameters per IN (...) query; SQLite builds before 3.32 allow at most 999
+    MAX_QUERY_PARAMETERS = 900
+
     def __init__(self, db_path: str = ".lineup_cache.db", auto_connect: bool = True):
         self.db_path = Path(db_path)
         self.connection: Optional[sqlite3.Connection] = None
         self.auto_connect = auto_connect
+        self.fts_enabled = False  # Set once the images_fts search index is available
         logger.info(f"Database manager initialized with path: {self.db_path}")
 
         if auto_connect:
@@ -37,6 +47,9 @@ class DatabaseManager:
             # Run database migrations
             self._run_migrations()
 
+            # Full-text index used by search_images
+            self._create_search_index()
+
             return self.connection
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}", exc_info=True)
@@ -67,6 +80,7 @@ class DatabaseManager:
                     total_images INTEGER,
                     master_count INTEGER,
                     existing_images INTEGER,
+                    match_reasons TEXT,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
@@ -107,6 +121,7 @@ class DatabaseManager:
             # Create indexes for performance
             indexes = [
                 "CREATE INDEX IF NOT EXISTS idx_group_id ON images(group_id)",
+                "CREATE INDEX IF NOT EXISTS idx_images_export ON images(group_id, is_master DESC, quality_score DESC)",
                 "CREATE INDEX IF NOT EXISTS idx_master ON images(is_master)",
                 "CREATE INDEX IF NOT EXISTS idx_quality_score ON images(quality_score)",
                 "CREATE INDEX IF NOT EXISTS idx_similarity_score ON images(similarity_score)",
@@ -154,20 +169,42 @@ class DatabaseManager:
                 self.connection.commit()
                 logger.info("Migration completed: status column added")
 
+            # Check if groups caches the joined match reasons
+            cursor.execute("PRAGMA table_info(groups)")
+            group_columns = [row[1] for row in cursor.fetchall()]
+
+            if 'match_reasons' not in group_columns:
+                logger.info("Running migration: Adding match_reasons column to groups table")
+                cursor.execute("ALTER TABLE groups ADD COLUMN match_reasons TEXT")
+
+                # Fill in the new column for data imported before the migration
+                self._update_group_summaries()
+
+                self.connection.commit()
+                logger.info("Migration completed: match_reasons column added")
+
         except Exception as e:
             logger.error(f"Failed to run migrations: {e}", exc_info=True)
             raise
     
-    def import_csv_data(self, csv_file_path: str) -> bool:
-        """Import CSV data into the SQLite database."""
+    def import_csv_data(self, csv_file_path: str, nrows: Optional[int] = None) -> bool:
+        """Import CSV data (optionally only the first nrows rows) into the SQLite database."""
+        logger.info(f"Starting CSV import from: {csv_file_path}")
+        
         try:
-            logger.info(f"Starting CSV import from: {csv_file_path}")
-            
             # Read CSV file
-            df = pd.read_csv(csv_file_path)
-            logger.info(f"Loaded CSV with {len(df)} rows and {len(df.columns)} columns")
-            logger.debug(f"CSV columns: {list(df.columns)}")
-            
+            df = pd.read_csv(csv_file_path, nrows=nrows)
+        except Exception as e:
+            logger.error(f"Error reading CSV data: {e}", exc_info=True)
+            raise
+        
+        logger.info(f"Loaded CSV with {len(df)} rows and {len(df.columns)} columns")
+        logger.debug(f"CSV columns: {list(df.columns)}")
+        return self.import_dataframe(df)
+    
+    def import_dataframe(self, df: pd.DataFrame) -> bool:
+        """Import an already-parsed CSV DataFrame into the SQLite database (modifies df in place)."""
+        try:
             # Validate required columns
             required_columns = ['GroupID', 'Master', 'File', 'Path']
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -176,8 +213,8 @@ class DatabaseManager:
                 logger.error(f"Missing required columns: {missing_columns}")
                 raise ValueError(f"Missing required columns: {missing_columns}")
             
-            # Clear existing data
-            self._clear_database()
+            # Clear existing data; committed together with the new rows
+            self._clear_database(commit=False)
             
             # Process and insert data
             self._process_and_insert_data(df)
@@ -186,15 +223,68 @@ class DatabaseManager:
             return True
             
         except Exception as e:
+            if self.connection:
+                self.connection.rollback()
             logger.error(f"Error importing CSV data: {e}", exc_info=True)
             raise
-    
-    def _clear_database(self):
+
+    def _create_search_index(self):
+        """Create the FTS5 index over the searchable text columns, if SQLite supports it."""
+        columns = ', '.join(self.SEARCH_COLUMNS)
+        new_values = ', '.join(f"new.{column}" for column in self.SEARCH_COLUMNS)
+        old_values = ', '.join(f"old.{column}" for column in self.SEARCH_COLUMNS)
+
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images_fts'")
+            index_exists = cursor.fetchone() is not None
+
+            # Trigram tokens keep the substring semantics of the old LIKE '%query%' search
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS images_fts USING fts5(
+                    {columns}, content='images', content_rowid='id', tokenize='trigram'
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS images_fts_insert AFTER INSERT ON images BEGIN
+                    INSERT INTO images_fts(rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS images_fts_delete AFTER DELETE ON images BEGIN
+                    INSERT INTO images_fts(images_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS images_fts_update AFTER UPDATE OF {columns} ON images BEGIN
+                    INSERT INTO images_fts(images_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                    INSERT INTO images_fts(rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+
+            if not index_exists:
+                # Index rows that were imported before the search index existed
+                cursor.execute("INSERT INTO images_fts(images_fts) VALUES ('rebuild')")
+
+            self.connection.commit()
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            self.connection.rollback()
+            self.fts_enabled = False
+            logger.warning(f"Full-text search unavailable, falling back to LIKE queries: {e}")
+
+    def clear(self):
+        """Delete all imported images and group summaries, keeping the schema."""
+        self.ensure_connection()
+        self._clear_database()
+
+    def _clear_database(self, commit: bool = True):
         """Clear all data from the database."""
         cursor = self.connection.cursor()
         cursor.execute("DELETE FROM images")
         cursor.execute("DELETE FROM groups")
-        self.connection.commit()
+        if commit:
+            self.connection.commit()
         logger.debug("Database cleared")
     
     def _process_and_insert_data(self, df: pd.DataFrame):
@@ -205,23 +295,16 @@ class DatabaseManager:
         # Clean and process data
         df = self._clean_dataframe(df)
 
-        # Prepare batch data for insertion
-        insert_data = []
-        for _, row in df.iterrows():
-            try:
-                insert_data.append((
-                    row['GroupID'], row.get('Algorithm'),
-                    row['is_master'], row.get('File'), row.get('Name'), row.get('Path'),
-                    row.get('size_bytes'), row.get('created_date'), row.get('modified_date'),
-                    row.get('Width'), row.get('Height'), row.get('FileType'),
-                    row.get('CameraMake'), row.get('CameraModel'), row.get('date_taken'),
-                    row.get('QualityScore'), row.get('IPTCKeywords'), row.get('IPTCCaption'),
-                    row.get('XMPKeywords'), row.get('XMPTitle'), row.get('SimilarityScore'),
-                    row.get('MatchReasons'), row['file_exists'], 'active'
-                ))
-            except Exception as e:
-                logger.warning(f"Failed to prepare image row: {e}")
-                continue
+        # Prepare batch data for insertion (columns missing from the CSV insert as NULL)
+        insert_columns = [
+            'GroupID', 'Algorithm', 'is_master', 'File', 'Name', 'Path',
+            'size_bytes', 'created_date', 'modified_date', 'Width', 'Height', 'FileType',
+            'CameraMake', 'CameraModel', 'date_taken', 'QualityScore', 'IPTCKeywords', 'IPTCCaption',
+            'XMPKeywords', 'XMPTitle', 'SimilarityScore', 'MatchReasons', 'file_exists'
+        ]
+        insert_df = df.reindex(columns=insert_columns).astype(object)
+        insert_df['status'] = 'active'
+        insert_data = list(insert_df.itertuples(index=False, name=None))
 
         # Batch insert all images at once
         try:
@@ -287,7 +370,7 @@ class DatabaseManager:
         date_fields = ['Created', 'Modified', 'DateTaken']
         for field in date_fields:
             if field in df.columns:
-                dt_series = pd.to_datetime(df[field], errors='coerce')
+                dt_series = self._parse_timestamps(df[field])
                 # Convert to ISO format string for SQLite compatibility
                 df[f'{field.lower()}_date'] = dt_series.dt.strftime('%Y-%m-%d %H:%M:%S').where(dt_series.notna(), None)
         
@@ -304,6 +387,19 @@ class DatabaseManager:
         
         return df
     
+    def _parse_timestamps(self, series: pd.Series) -> pd.Series:
+        """Parse a date column holding Unix epoch seconds and/or date strings."""
+        # Numeric values are epoch seconds (photochomper writes e.g. 1649000000.0)
+        epoch = pd.to_numeric(series, errors='coerce')
+        parsed = pd.to_datetime(epoch, unit='s', errors='coerce')
+        
+        # Anything else is parsed as a date string
+        text = series.where(epoch.isna())
+        if text.notna().any():
+            parsed = parsed.fillna(pd.to_datetime(text, errors='coerce'))
+        
+        return parsed
+    
     def _convert_size_to_bytes(self, size_series: pd.Series) -> pd.Series:
         """Convert size values to bytes."""
         def convert_size(size_str):
@@ -337,8 +433,8 @@ class DatabaseManager:
             return False
         
         try:
-            path = Path(file_path)
-            exists = path.exists() and path.is_file()
+            # is_file() is False for missing paths, so one stat answers both questions
+            exists = Path(file_path).is_file()
             if not exists:
                 logger.debug(f"Missing file: {file_path}")
             return exists
@@ -362,17 +458,34 @@ class DatabaseManager:
         """)
         
         groups_data = cursor.fetchall()
-        
+
+        # Distinct match reasons per group in first-seen order, joined once here so
+        # summary lookups need no images query
+        cursor.execute("""
+            SELECT group_id, match_reasons FROM images
+            WHERE match_reasons IS NOT NULL AND match_reasons != ''
+            GROUP BY group_id, match_reasons
+            ORDER BY group_id, MIN(id)
+        """)
+        match_reasons: Dict[str, List[str]] = {}
+        for r in cursor.fetchall():
+            match_reasons.setdefault(r['group_id'], []).append(r['match_reasons'])
+
         # Insert group summaries
-        for group in groups_data:
-            cursor.execute("""
-                INSERT OR REPLACE INTO groups (
-                    group_id, algorithm, total_images, master_count, existing_images, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+        now = datetime.now()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO groups (
+                group_id, algorithm, total_images, master_count, existing_images,
+                match_reasons, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
                 group['group_id'], group['algorithm'], group['total_images'],
-                group['master_count'], group['existing_images'], datetime.now()
-            ))
+                group['master_count'], group['existing_images'],
+                ', '.join(match_reasons.get(group['group_id'], [])), now
+            )
+            for group in groups_data
+        ])
         
         logger.info(f"Updated {len(groups_data)} group summaries")
     
@@ -395,14 +508,31 @@ class DatabaseManager:
         if not row:
             return {}
 
-        # Get match reasons for the group
-        cursor.execute("""
-            SELECT DISTINCT match_reasons FROM images
-            WHERE group_id = ? AND match_reasons IS NOT NULL AND match_reasons != ''
-        """, (group_id,))
+        return self._group_summary_from_row(row)
 
-        match_reasons = [r['match_reasons'] for r in cursor.fetchall()]
+    def get_group_summaries(self, group_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get summary information for several groups, keyed by group ID."""
+        if not group_ids:
+            return {}
 
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        summaries = {}
+
+        # Query in chunks to stay under SQLite's bound-parameter limit
+        for start in range(0, len(group_ids), self.MAX_QUERY_PARAMETERS):
+            chunk = group_ids[start:start + self.MAX_QUERY_PARAMETERS]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f"""
+                SELECT * FROM groups WHERE group_id IN ({placeholders})
+            """, tuple(chunk))
+            for row in cursor.fetchall():
+                summaries[row['group_id']] = self._group_summary_from_row(row)
+
+        return summaries
+
+    def _group_summary_from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Build a group summary dict from a groups table row."""
         return {
             'group_id': row['group_id'],
             'algorithm': row['algorithm'],
@@ -410,9 +540,23 @@ class DatabaseManager:
             'master_count': row['master_count'],
             'existing_images': row['existing_images'],
             'missing_images': row['total_images'] - row['existing_images'],
-            'match_reasons': ', '.join(match_reasons) if match_reasons else 'Unknown'
+            'match_reasons': row['match_reasons'] or 'Unknown'
         }
 
+    def count_groups_with_multiple_existing_images(self) -> int:
+        """Count groups that have more than one existing image."""
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT group_id FROM images
+                WHERE file_exists = 1
+                GROUP BY group_id
+                HAVING COUNT(*) > 1
+            )
+        """)
+        return cursor.fetchone()[0]
+
     def get_group_images(self, group_id: str) -> pd.DataFrame:
         """Get all images for a specific group."""
         self.ensure_connection()
@@ -439,24 +583,21 @@ class DatabaseManager:
         cursor.execute("SELECT COUNT(*) as total_groups FROM groups")
         total_groups = cursor.fetchone()['total_groups']
 
-        cursor.execute("SELECT COUNT(*) as total_images FROM images")
-        total_images = cursor.fetchone()['total_images']
-
-        cursor.execute("SELECT COUNT(*) as missing_images FROM images WHERE NOT file_exists")
-        missing_images = cursor.fetchone()['missing_images']
-
-        cursor.execute("SELECT COUNT(*) as master_images FROM images WHERE is_master")
-        master_images = cursor.fetchone()['master_images']
-
-        # Get quality statistics
+        # Image counts and quality statistics in a single pass over images
         cursor.execute("""
             SELECT
+                COUNT(*) as total_images,
+                COUNT(CASE WHEN NOT file_exists THEN 1 END) as missing_images,
+                COUNT(CASE WHEN is_master THEN 1 END) as master_images,
                 AVG(quality_score) as avg_quality,
                 MIN(quality_score) as min_quality,
                 MAX(quality_score) as max_quality
-            FROM images WHERE quality_score IS NOT NULL
+            FROM images
         """)
         quality_stats = cursor.fetchone()
+        total_images = quality_stats['total_images']
+        missing_images = quality_stats['missing_images']
+        master_images = quality_stats['master_images']
 
         return {
             'total_groups': total_groups,
@@ -475,15 +616,22 @@ class DatabaseManager:
         cursor = self.connection.cursor()
         cursor.execute("SELECT id, path FROM images")
 
-        updates = 0
+        # Rows can share a path, so stat each distinct path only once per validation
+        exists_by_path: Dict[str, bool] = {}
+        updates = []
         for row in cursor.fetchall():
-            file_exists = self._check_file_exists(row['path'])
-            cursor.execute("UPDATE images SET file_exists = ? WHERE id = ?",
-                         (file_exists, row['id']))
-            updates += 1
+            path = row['path']
+            if path not in exists_by_path:
+                exists_by_path[path] = self._check_file_exists(path)
+            updates.append((exists_by_path[path], row['id']))
+
+        cursor.executemany("UPDATE images SET file_exists = ? WHERE id = ?", updates)
+
+        # Keep the cached per-group existing_images counts in step
+        self._update_group_summaries()
 
         self.connection.commit()
-        logger.info(f"Validated {updates} file paths")
+        logger.info(f"Validated {len(updates)} file paths")
 
     def update_record_status(self, file_path: str, new_status: str):
         """Update the status of a record by file path."""
@@ -529,19 +677,29 @@ class DatabaseManager:
         logger.info(f"Updated status to '{new_status}' for {affected_rows} record(s)")
         return affected_rows
 
-    def get_active_images(self, group_id: str = None) -> pd.DataFrame:
-        """Get all active images, optionally filtered by group."""
+    def has_active_images(self, group_id: str) -> bool:
+        """Check whether a group has any active images without loading them."""
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT 1 FROM images WHERE group_id = ? AND status = 'active' LIMIT 1
+        """, (group_id,))
+        return cursor.fetchone() is not None
+
+    def get_active_images(self, group_id: str = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get all active images, optionally filtered by group and limited to the given columns."""
         self.ensure_connection()
         cursor = self.connection.cursor()
+        projection = ', '.join(columns) if columns else '*'
 
         if group_id:
-            cursor.execute("""
-                SELECT * FROM images WHERE group_id = ? AND status = 'active'
+            cursor.execute(f"""
+                SELECT {projection} FROM images WHERE group_id = ? AND status = 'active'
                 ORDER BY is_master DESC, quality_score DESC
             """, (group_id,))
         else:
-            cursor.execute("""
-                SELECT * FROM images WHERE status = 'active'
+            cursor.execute(f"""
+                SELECT {projection} FROM images WHERE status = 'active'
                 ORDER BY group_id, is_master DESC, quality_score DESC
             """)
 
@@ -554,6 +712,70 @@ class DatabaseManager:
         data = [dict(row) for row in rows]
         return pd.DataFrame(data, columns=columns)
 
+    def get_active_images_for_groups(self, group_ids: List[str]) -> pd.DataFrame:
+        """Get active images for several groups, ordered by group."""
+        if not group_ids:
+            return pd.DataFrame()
+
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        frames = []
+
+        # Query sorted IDs in chunks to stay under SQLite's bound-parameter limit;
+        # each chunk is ordered by group_id, so the concatenation is too
+        sorted_ids = sorted(set(group_ids))
+        for start in range(0, len(sorted_ids), self.MAX_QUERY_PARAMETERS):
+            chunk = sorted_ids[start:start + self.MAX_QUERY_PARAMETERS]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f"""
+                SELECT * FROM images WHERE group_id IN ({placeholders}) AND status = 'active'
+                ORDER BY group_id, is_master DESC, quality_score DESC
+            """, tuple(chunk))
+
+            rows = cursor.fetchall()
+            if rows:
+                # Convert to DataFrame
+                columns = [col[0] for col in cursor.description]
+                data = [dict(row) for row in rows]
+                frames.append(pd.DataFrame(data, columns=columns))
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def search_images(self, query: str, limit: int = 100, field: Optional[str] = None) -> pd.DataFrame:
+        """Search the text columns (or just field) for a substring, using the FTS5 index when available."""
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        columns = (field,) if field else self.SEARCH_COLUMNS
+
+        # Trigram matching needs at least three characters; other fields are not indexed
+        if self.fts_enabled and len(query) >= 3 and set(columns) <= set(self.SEARCH_COLUMNS):
+            phrase = '"' + query.replace('"', '""') + '"'
+            if field:
+                phrase = f"{field} : {phrase}"
+            cursor.execute("""
+                SELECT * FROM images WHERE id IN (
+                    SELECT rowid FROM images_fts WHERE images_fts MATCH ? ORDER BY rowid LIMIT ?
+                )
+                ORDER BY id
+            """, (phrase, limit))
+        else:
+            conditions = ' OR '.join(f"{column} LIKE ?" for column in columns)
+            cursor.execute(
+                f"SELECT * FROM images WHERE {conditions} LIMIT ?",
+                tuple([f"%{query}%"] * len(columns) + [limit])
+            )
+
+        rows = cursor.fetchall()
+        if not rows:
+            return pd.DataFrame()
+
+        # Convert to DataFrame
+        columns = [col[0] for col in cursor.description]
+        data = [dict(row) for row in rows]
+        return pd.DataFrame(data, columns=columns)
+
     def __enter__(self):
         """Context manager entry."""
         self.connect()
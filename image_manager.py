@@ -74,18 +74,21 @@ class ImageManager:
         """Get the path for a cached thumbnail."""
         return self.cache_dir / f"{cache_key}.png"
     
-    def load_thumbnail(self, file_path: str, callback=None, quick_load=False) -> Optional[ImageTk.PhotoImage]:
+    def load_thumbnail(self, file_path: str, callback=None, quick_load=False,
+                       size: Optional[Tuple[int, int]] = None) -> Optional[ImageTk.PhotoImage]:
         """Load or generate thumbnail for an image.
 
         Args:
             file_path: Path to the image file
             callback: Optional callback function for async loading
             quick_load: If True, return a quick low-quality preview first
+            size: Optional thumbnail size (width, height), defaults to thumbnail_size
         """
         if not Path(file_path).exists():
             return None
 
-        cache_key = self._get_cache_key(file_path, self.thumbnail_size)
+        size = size or self.thumbnail_size
+        cache_key = self._get_cache_key(file_path, size)
 
         # Check in-memory cache first
         if cache_key in self.thumbnail_cache:
@@ -116,7 +119,7 @@ class ImageManager:
 
         # Quick load mode: provide immediate low-quality preview
         if quick_load and callback:
-            self._load_quick_thumbnail_async(file_path, cache_key, callback)
+            self._load_quick_thumbnail_async(file_path, cache_key, callback, size)
             return None
 
         # Generate new thumbnail
@@ -124,17 +127,19 @@ class ImageManager:
             # Generate asynchronously
             thread = threading.Thread(
                 target=self._generate_thumbnail_async,
-                args=(file_path, cache_key, callback)
+                args=(file_path, cache_key, callback, size)
             )
             thread.daemon = True
             thread.start()
             return None
         else:
             # Generate synchronously
-            return self._generate_thumbnail(file_path, cache_key)
+            return self._generate_thumbnail(file_path, cache_key, size)
     
-    def _generate_thumbnail(self, file_path: str, cache_key: str) -> Optional[ImageTk.PhotoImage]:
+    def _generate_thumbnail(self, file_path: str, cache_key: str,
+                            size: Optional[Tuple[int, int]] = None) -> Optional[ImageTk.PhotoImage]:
         """Generate thumbnail synchronously."""
+        size = size or self.thumbnail_size
         try:
             with Image.open(file_path) as image:
                 # Convert to RGB if necessary
@@ -142,7 +147,7 @@ class ImageManager:
                     image = image.convert('RGB')
                 
                 # Generate thumbnail
-                image.thumbnail(self.thumbnail_size, Image.Resampling.LANCZOS)
+                image.thumbnail(size, Image.Resampling.LANCZOS)
                 
                 # Save to disk cache
                 cached_path = self._get_cached_thumbnail_path(cache_key)
@@ -153,7 +158,7 @@ class ImageManager:
                 self.cache_metadata[cache_key] = {
                     'file_path': file_path,
                     'mtime': file_stat.st_mtime,
-                    'size': self.thumbnail_size
+                    'size': size
                 }
                 self._save_cache_metadata()
                 
@@ -167,8 +172,11 @@ class ImageManager:
             logging.error(f"Could not generate thumbnail for {file_path}: {e}")
             return None
     
-    def _load_quick_thumbnail_async(self, file_path: str, cache_key: str, callback):
+    def _load_quick_thumbnail_async(self, file_path: str, cache_key: str, callback,
+                                    size: Optional[Tuple[int, int]] = None):
         """Load a quick, low-quality thumbnail first, then a high-quality one."""
+        size = size or self.thumbnail_size
+
         def quick_load_worker():
             try:
                 # First pass: Quick, low-quality thumbnail
@@ -177,19 +185,19 @@ class ImageManager:
                         image = image.convert('RGB')
 
                     # Create a very quick, low-quality preview (1/4 size, then scaled up)
-                    quick_size = (self.thumbnail_size[0] // 2, self.thumbnail_size[1] // 2)
+                    quick_size = (size[0] // 2, size[1] // 2)
                     quick_image = image.copy()
                     quick_image.thumbnail(quick_size, Image.Resampling.NEAREST)  # Fastest resampling
 
                     # Scale back up for display
-                    quick_image = quick_image.resize(self.thumbnail_size, Image.Resampling.NEAREST)
+                    quick_image = quick_image.resize(size, Image.Resampling.NEAREST)
                     quick_photo = ImageTk.PhotoImage(quick_image)
 
                     # Provide quick preview immediately
                     callback(quick_photo)
 
                     # Now generate high-quality thumbnail in background
-                    high_quality_photo = self._generate_thumbnail(file_path, cache_key)
+                    high_quality_photo = self._generate_thumbnail(file_path, cache_key, size)
                     if high_quality_photo:
                         # Replace with high-quality version
                         callback(high_quality_photo)
@@ -197,16 +205,17 @@ class ImageManager:
             except Exception as e:
                 logger.warning(f"Failed to load quick thumbnail for {file_path}: {e}")
                 # Fallback to normal thumbnail generation
-                photo_image = self._generate_thumbnail(file_path, cache_key)
+                photo_image = self._generate_thumbnail(file_path, cache_key, size)
                 if photo_image:
                     callback(photo_image)
 
         thread = threading.Thread(target=quick_load_worker, daemon=True)
         thread.start()
 
-    def _generate_thumbnail_async(self, file_path: str, cache_key: str, callback):
+    def _generate_thumbnail_async(self, file_path: str, cache_key: str, callback,
+                                  size: Optional[Tuple[int, int]] = None):
         """Generate thumbnail asynchronously and call callback."""
-        photo_image = self._generate_thumbnail(file_path, cache_key)
+        photo_image = self._generate_thumbnail(file_path, cache_key, size)
         if photo_image and callback:
             # Schedule callback on main thread
             callback(photo_image)
@@ -491,10 +500,14 @@ class ImageWidget(ctk.CTkFrame):
                 # Keep reference to prevent garbage collection
                 self.image_label.image = photo_image
 
+        # Key the cache on this widget's own size rather than the shared manager setting
+        size = (self.thumbnail_size, self.thumbnail_size)
+
         # Try to load from cache first (immediate)
         thumbnail = self.image_manager.load_thumbnail(
             self.image_data['Path'],
-            callback=None  # No callback, just check cache
+            callback=None,  # No callback, just check cache
+            size=size
         )
 
         if thumbnail:
@@ -507,7 +520,8 @@ class ImageWidget(ctk.CTkFrame):
             self.image_manager.load_thumbnail(
                 self.image_data['Path'],
                 callback=thumbnail_callback,
-                quick_load=True  # Use the new quick loading feature
+                quick_load=True,  # Use the new quick loading feature
+                size=size
             )
     
     def on_click(self, event):
@@ -545,7 +559,7 @@ class ImageWidget(ctk.CTkFrame):
 class ImageViewerWindow:
     """Full-size image viewer window with navigation."""
     
-    def __init__(self, parent, image_widgets, current_index, image_manager, data_manager=None, current_group=None, main_app=None):
+    def __init__(self, parent, image_widgets, current_index, image_manager, data_manager=None, current_group=None, main_app=None, on_close=None):
         self.parent = parent
         self.image_widgets = image_widgets
         self.current_index = current_index
@@ -553,6 +567,7 @@ class ImageViewerWindow:
         self.data_manager = data_manager
         self.current_group = current_group
         self.main_app = main_app
+        self.on_close = on_close  # Called once when the window is destroyed
         
         # Create window
         self.window = ctk.CTkToplevel(parent)
@@ -563,6 +578,9 @@ class ImageViewerWindow:
         # Make window modal
         self.window.transient(parent)
         self.window.grab_set()
+
+        # Notify the owner however the window goes away (Esc, close button, window manager)
+        self.window.bind("<Destroy>", self._on_window_destroy)
         
         # Center window on parent
         self.center_window()
@@ -1139,15 +1157,18 @@ class ImageViewerWindow:
                 parent=self.window
             )
     
+    def _on_window_destroy(self, event):
+        """Invoke the on_close callback when the top-level window is destroyed."""
+        # <Destroy> also fires for every child widget of the toplevel
+        if event.widget is not self.window or self.on_close is None:
+            return
+
+        callback = self.on_close
+        self.on_close = None
+        callback()
+
     def close(self):
         """Close the viewer window."""
-        # Remove from main app's tracking list
-        if self.main_app and hasattr(self.main_app, 'active_image_viewers'):
-            try:
-                self.main_app.active_image_viewers.remove(self)
-            except ValueError:
-                pass  # Already removed
-        
         self.window.grab_release()
         self.window.destroy()
     
@@ -66,6 +66,15 @@ class LineupApp:
         self.group_buttons = {}  # Track group buttons for visual feedback
         self.auto_select_enabled = True  # Auto-select non-masters by default
         self.hide_single_groups = True  # Hide groups with 1 or fewer images
+        self._last_thumb_size = None  # Last thumbnail size pushed to the image manager
+        self._stats_dialog = None  # Reused statistics dialog
+        self._stats_label = None
+        self._stats_cache = None  # (cache key, rendered statistics text)
+        self._view_dispatch = {  # Views dropdown entry -> handler
+            "📋 List View": self.open_list_view,
+            "📊 Statistics": self.show_statistics_view,
+            "🔍 Search": self.show_search_view,
+        }
         
         self.setup_ui()
         logger.info("Lineup application initialized successfully")
@@ -669,6 +678,7 @@ class LineupApp:
         self.selected_images.clear()
         self.image_widgets.clear()
         self.group_buttons.clear()
+        self._stats_cache = None
         logger.debug("Reset UI state for new CSV data")
         
         # Create group navigation panel
@@ -754,9 +764,15 @@ class LineupApp:
         groups = self.data_manager.get_group_list()
         logger.debug(f"Processing {len(groups)} total groups")
         
+        # Fetch every group's summary in one batch rather than one query per button
+        summaries = self.data_manager.get_group_summaries(groups)
+        
         displayed_groups = 0
         for group_id in groups:
-            summary = self.data_manager.get_group_summary(group_id)
+            summary = summaries.get(group_id)
+            if not summary:
+                logger.warning(f"No summary available for group {group_id}")
+                continue
             
             # Skip groups with 1 or fewer images if hiding is enabled
             if self.hide_single_groups and summary['existing_images'] <= 1:
@@ -918,8 +934,13 @@ class LineupApp:
                     best_thumb_size = thumb_size
                     break
         
-        # Update image manager thumbnail size
-        self.image_manager.thumbnail_size = (int(best_thumb_size), int(best_thumb_size))
+        # Update image manager thumbnail size only when it actually changes so
+        # cached thumbnails stay valid while navigating between groups
+        thumb_size = int(best_thumb_size)
+        if thumb_size != self._last_thumb_size:
+            self.image_manager.thumbnail_size = (thumb_size, thumb_size)
+            self._last_thumb_size = thumb_size
+            logger.debug(f"Thumbnail size changed to {thumb_size}px")
         
         # Create grid layout for images
         columns = best_columns
@@ -932,7 +953,7 @@ class LineupApp:
                 self.image_scroll_frame,
                 image_data,
                 self.image_manager,
-                thumbnail_size=int(best_thumb_size),
+                thumbnail_size=thumb_size,
                 main_app=self
             )
             
@@ -1029,11 +1050,17 @@ class LineupApp:
             self.image_manager,
             self.data_manager,
             self.current_group,
-            self
+            self,
+            on_close=lambda: self.unregister_image_viewer(viewer)
         )
         # Track the viewer
         self.active_image_viewers.append(viewer)
         viewer.show()
+
+    def unregister_image_viewer(self, viewer):
+        """Stop tracking an image viewer once its window has been destroyed."""
+        if viewer in self.active_image_viewers:
+            self.active_image_viewers.remove(viewer)
     
     def on_image_selection_changed(self, image_widget):
         """Handle image selection changes."""
@@ -1234,11 +1261,7 @@ class LineupApp:
     
     def notify_viewers_directory_changed(self):
         """Notify all active image viewers that the move directory has changed."""
-        # Clean up closed viewers
-        self.active_image_viewers = [viewer for viewer in self.active_image_viewers 
-                                   if hasattr(viewer, 'window') and viewer.window.winfo_exists()]
-        
-        # Notify remaining viewers
+        # Viewers unregister themselves on close, so the list only holds open windows
         for viewer in self.active_image_viewers:
             if hasattr(viewer, 'update_move_button_text'):
                 viewer.update_move_button_text()
@@ -1257,6 +1280,7 @@ class LineupApp:
             logger.debug(f"Refreshing display for group {self.current_group}")
             # Revalidate file paths in data manager
             self.data_manager.validate_file_paths()
+            self._stats_cache = None
             # Repopulate group list (counts may have changed)
             self.populate_group_list()
             
@@ -1338,7 +1362,8 @@ class LineupApp:
         # Count total and single groups for user feedback
         if hasattr(self, 'data_manager') and self.data_manager.has_data():
             all_groups = self.data_manager.get_group_list()
-            single_groups = [g for g in all_groups if self.data_manager.get_group_summary(g)['existing_images'] <= 1]
+            summaries = self.data_manager.get_group_summaries(all_groups)
+            single_groups = [g for g, summary in summaries.items() if summary['existing_images'] <= 1]
             
             if self.hide_single_groups:
                 status_msg = f"Hiding {len(single_groups)} single-image groups ({len(all_groups) - len(single_groups)} groups shown)"
@@ -1476,15 +1501,12 @@ class LineupApp:
         """Handle selection from the views dropdown menu."""
         logger.info(f"View selection: {selection}")
         
-        if selection == "📋 List View":
-            self.open_list_view()
-        elif selection == "📊 Statistics":
-            self.show_statistics_view()
-        elif selection == "🔍 Search":
-            self.show_search_view()
-        elif selection == "Select View...":
-            # Default option - do nothing
+        handler = self._view_dispatch.get(selection)
+        if handler is None:
+            # Default option or unknown entry - nothing to run, but don't leave it displayed
+            self.views_menu.set("Select View...")
             return
+        handler()
         
         # Reset menu to default after action
         self.views_menu.set("Select View...")
@@ -1495,15 +1517,31 @@ class LineupApp:
             self.show_operation_status("No data loaded", "red")
             return
         
-        summary = self.data_manager.get_overall_summary()
-        stats_message = (
-            f"Dataset Statistics:\n"
-            f"• Total Groups: {summary['total_groups']}\n"
-            f"• Total Images: {summary['total_images']}\n"
-            f"• Missing Images: {summary['missing_images']}\n"
-            f"• Available Images: {summary['total_images'] - summary['missing_images']}\n"
-            f"• Groups with Multiple Images: {len([g for g in self.data_manager.get_group_list() if self.data_manager.get_group_summary(g)['existing_images'] > 1])}"
-        )
+        # Only recompute the statistics when the underlying data may have changed
+        cache_key = self._get_statistics_cache_key()
+        if self._stats_cache is None or self._stats_cache[0] != cache_key:
+            summary = self.data_manager.get_overall_summary()
+            stats_message = (
+                f"Dataset Statistics:\n"
+                f"• Total Groups: {summary['total_groups']}\n"
+                f"• Total Images: {summary['total_images']}\n"
+                f"• Missing Images: {summary['missing_images']}\n"
+                f"• Available Images: {summary['total_images'] - summary['missing_images']}\n"
+                f"• Groups with Multiple Images: {self.data_manager.count_groups_with_multiple_existing_images()}"
+            )
+            self._stats_cache = (cache_key, stats_message)
+        else:
+            stats_message = self._stats_cache[1]
+            logger.debug("Using cached statistics")
+        
+        # Reuse the existing dialog if it is still around
+        if self._stats_dialog is not None and self._stats_dialog.winfo_exists():
+            self._stats_label.configure(text=stats_message)
+            self._stats_dialog.deiconify()
+            self._stats_dialog.lift()
+            self._stats_dialog.grab_set()
+            logger.info("Statistics view displayed")
+            return
         
         # Show in a dialog
         dialog = ctk.CTkToplevel(self.root)
@@ -1515,11 +1553,41 @@ class LineupApp:
         label = ctk.CTkLabel(dialog, text=stats_message, font=ctk.CTkFont(size=12), justify="left")
         label.pack(padx=20, pady=20)
         
-        close_btn = ctk.CTkButton(dialog, text="Close", command=dialog.destroy)
+        close_btn = ctk.CTkButton(dialog, text="Close", command=self.hide_statistics_view)
         close_btn.pack(pady=10)
         
+        # Hide rather than destroy so the dialog can be shown again cheaply
+        dialog.protocol("WM_DELETE_WINDOW", self.hide_statistics_view)
+        dialog.bind("<Destroy>", self._on_statistics_dialog_destroyed)
+        
+        self._stats_dialog = dialog
+        self._stats_label = label
+        
         logger.info("Statistics view displayed")
     
+    def hide_statistics_view(self):
+        """Hide the statistics dialog, keeping it for reuse."""
+        if self._stats_dialog is not None and self._stats_dialog.winfo_exists():
+            self._stats_dialog.grab_release()
+            self._stats_dialog.withdraw()
+    
+    def _on_statistics_dialog_destroyed(self, event):
+        """Forget the statistics dialog once its window is destroyed."""
+        if event.widget is self._stats_dialog:
+            self._stats_dialog = None
+            self._stats_label = None
+    
+    def _get_statistics_cache_key(self):
+        """Build a key that changes whenever the displayed statistics may change."""
+        db_mtime = None
+        if self.data_manager.use_database and self.data_manager.db_manager:
+            try:
+                db_mtime = self.data_manager.db_manager.db_path.stat().st_mtime_ns
+            except OSError:
+                pass
+        
+        return (id(self.data_manager), db_mtime, len(self.group_buttons))
+    
     def show_search_view(self):
         """Show search functionality - placeholder for future implementation."""
         self.show_operation_status("Search functionality - use List View for now", "blue")
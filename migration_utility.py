@@ -4,14 +4,15 @@ Migration utility for transitioning from legacy CSV-only to SQLite database back
 This utility can be run standalone or integrated into the main application.
 """
 
-import argparse
+import json
 import logging
+import os
+import sqlite3
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 from database_manager import DatabaseManager
-from data_manager_enhanced import DataManager
 
 # Setup logging for migration
 logging.basicConfig(
@@ -31,7 +32,23 @@ class MigrationUtility:
     
     def __init__(self, database_path: str = ".lineup_cache.db"):
         self.database_path = database_path
-        self.db_manager = DatabaseManager(database_path)
+        # Opened on first use and kept for the life of the utility; connecting eagerly
+        # would create an empty database file before migrate/verify can check for one
+        self.db_manager = DatabaseManager(database_path, auto_connect=False)
+        
+        # (database mtime_ns, overall summary) from the last successful verification,
+        # mirrored to a sidecar file so later runs can skip re-verifying
+        self._summary_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        self.status_cache_path = Path(f"{database_path}.status.json")
+    
+    def _connect(self) -> DatabaseManager:
+        """Return the database manager, opening its connection if needed."""
+        self.db_manager.connect()
+        return self.db_manager
+    
+    def close(self):
+        """Close the database connection."""
+        self.db_manager.disconnect()
     
     def migrate_csv_to_database(self, csv_file_path: str, force: bool = False) -> bool:
         """
@@ -47,42 +64,56 @@ class MigrationUtility:
         try:
             csv_path = Path(csv_file_path)
             if not csv_path.exists():
-                logger.error(f"CSV file not found: {csv_file_path}")
+                logger.error("CSV file not found: %s", csv_file_path)
                 return False
             
             db_path = Path(self.database_path)
             if db_path.exists() and not force:
-                logger.error(f"Database already exists: {self.database_path}")
+                logger.error("Database already exists: %s", self.database_path)
                 logger.info("Use --force to overwrite existing database")
                 return False
             
-            logger.info(f"Starting migration from {csv_file_path} to {self.database_path}")
+            logger.info("Starting migration from %s to %s", csv_file_path, self.database_path)
             
             # Remove existing database if force is enabled
             if force and db_path.exists():
+                self.close()
                 db_path.unlink()
                 logger.info("Removed existing database")
             
             # Perform migration
-            with self.db_manager as db:
+            db = self._connect()
+            # Relax durability for the bulk load; the file is rebuilt from CSV on failure
+            db.connection.commit()
+            cursor = db.connection.cursor()
+            previous_synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+            previous_journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA journal_mode = MEMORY").fetchall()
+            try:
                 success = db.import_csv_data(str(csv_path))
+            finally:
+                db.connection.commit()
+                cursor.execute(f"PRAGMA journal_mode = {previous_journal_mode}").fetchall()
+                cursor.execute(f"PRAGMA synchronous = {previous_synchronous}")
+            
+            if success:
+                # Get summary stats
+                summary = db.get_overall_summary()
+                logger.info("Migration completed successfully!")
+                logger.info("Migrated %s groups and %s images", summary['total_groups'], summary['total_images'])
+                
+                if summary.get('missing_images', 0) > 0:
+                    logger.warning("Found %s missing image files", summary['missing_images'])
+                
+                self._store_summary(os.stat(self.database_path).st_mtime_ns, summary)
+                return True
+            else:
+                logger.error("Migration failed during database import")
+                return False
                 
-                if success:
-                    # Get summary stats
-                    summary = db.get_overall_summary()
-                    logger.info("Migration completed successfully!")
-                    logger.info(f"Migrated {summary['total_groups']} groups and {summary['total_images']} images")
-                    
-                    if summary.get('missing_images', 0) > 0:
-                        logger.warning(f"Found {summary['missing_images']} missing image files")
-                    
-                    return True
-                else:
-                    logger.error("Migration failed during database import")
-                    return False
-                    
         except Exception as e:
-            logger.error(f"Migration failed with error: {e}", exc_info=True)
+            logger.error("Migration failed with error: %s", e, exc_info=True)
             return False
     
     def verify_database(self) -> bool:
@@ -92,55 +123,112 @@ class MigrationUtility:
         Returns:
             True if database is valid, False otherwise
         """
+        return self._verify_and_summarize() is not None
+    
+    def _verify_and_summarize(self) -> Optional[Dict[str, Any]]:
+        """
+        Verify the database and return the overall summary computed along the way.
+        
+        Returns:
+            Overall summary dictionary if database is valid, None otherwise
+        """
         try:
             db_path = Path(self.database_path)
             if not db_path.exists():
-                logger.error(f"Database file not found: {self.database_path}")
-                return False
+                logger.error("Database file not found: %s", self.database_path)
+                return None
             
-            logger.info(f"Verifying database: {self.database_path}")
+            logger.info("Verifying database: %s", self.database_path)
             
-            with self.db_manager as db:
-                # Check database structure
-                cursor = db.connection.cursor()
-                
-                # Verify tables exist
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [row[0] for row in cursor.fetchall()]
-                
-                expected_tables = ['groups', 'images']
-                missing_tables = [table for table in expected_tables if table not in tables]
-                
-                if missing_tables:
-                    logger.error(f"Missing database tables: {missing_tables}")
-                    return False
-                
-                # Check data integrity
-                summary = db.get_overall_summary()
-                logger.info(f"Database contains {summary['total_groups']} groups and {summary['total_images']} images")
-                
-                # Verify indexes exist
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
-                indexes = [row[0] for row in cursor.fetchall()]
-                logger.info(f"Found {len(indexes)} database indexes")
-                
-                # Check for data consistency
+            db = self._connect()
+            # Check database structure
+            cursor = db.connection.cursor()
+            
+            # Collect tables, indexes and the orphaned-image count in one round trip
+            try:
                 cursor.execute("""
-                    SELECT COUNT(*) FROM images i 
-                    LEFT JOIN groups g ON i.group_id = g.group_id 
-                    WHERE g.group_id IS NULL
+                    SELECT 'table' AS kind, name AS value FROM sqlite_master WHERE type='table'
+                    UNION ALL
+                    SELECT 'index', name FROM sqlite_master WHERE type='index'
+                    UNION ALL
+                    SELECT 'orphan', COUNT(*) FROM images i
+                    WHERE NOT EXISTS (SELECT 1 FROM groups g WHERE g.group_id = i.group_id)
                 """)
-                orphaned_images = cursor.fetchone()[0]
-                
-                if orphaned_images > 0:
-                    logger.warning(f"Found {orphaned_images} orphaned images (no corresponding group)")
-                
-                logger.info("Database verification completed successfully")
-                return True
-                
+            except sqlite3.OperationalError as e:
+                logger.error("Missing database tables: %s", e)
+                return None
+            
+            tables = []
+            indexes = []
+            orphaned_images = 0
+            for kind, value in cursor.fetchall():
+                if kind == 'table':
+                    tables.append(value)
+                elif kind == 'index':
+                    indexes.append(value)
+                else:
+                    orphaned_images = value
+            
+            expected_tables = ['groups', 'images']
+            missing_tables = [table for table in expected_tables if table not in tables]
+            
+            if missing_tables:
+                logger.error("Missing database tables: %s", missing_tables)
+                return None
+            
+            # Check data integrity
+            summary = db.get_overall_summary()
+            logger.info("Database contains %s groups and %s images", summary['total_groups'], summary['total_images'])
+            
+            logger.info("Found %s database indexes", len(indexes))
+            
+            if orphaned_images > 0:
+                logger.warning("Found %s orphaned images (no corresponding group)", orphaned_images)
+            
+            logger.info("Database verification completed successfully")
+            return summary
+            
         except Exception as e:
-            logger.error(f"Database verification failed: {e}", exc_info=True)
-            return False
+            logger.error("Database verification failed: %s", e, exc_info=True)
+            return None
+    
+    def _get_verified_summary(self) -> Optional[Dict[str, Any]]:
+        """Return the verified overall summary, reusing it while the database file is unchanged."""
+        try:
+            mtime = os.stat(self.database_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        
+        if mtime is not None and self._summary_cache is None:
+            self._summary_cache = self._load_status_cache()
+        
+        if mtime is not None and self._summary_cache and self._summary_cache[0] == mtime:
+            logger.debug("Using cached database summary")
+            return self._summary_cache[1]
+        
+        summary = self._verify_and_summarize()
+        if summary is not None and mtime is not None:
+            self._store_summary(mtime, summary)
+        
+        return summary
+    
+    def _load_status_cache(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Read the (mtime_ns, summary) pair saved by a previous run, if any."""
+        try:
+            with open(self.status_cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            return cached['mtime_ns'], cached['summary']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def _store_summary(self, mtime: int, summary: Dict[str, Any]):
+        """Remember a verified summary in memory and in the sidecar status file."""
+        self._summary_cache = (mtime, summary)
+        try:
+            with open(self.status_cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'mtime_ns': mtime, 'summary': summary}, f)
+        except OSError as e:
+            logger.warning("Could not write status cache %s: %s", self.status_cache_path, e)
     
     def export_database_to_csv(self, output_csv_path: str) -> bool:
         """
@@ -153,66 +241,75 @@ class MigrationUtility:
             True if export successful, False otherwise
         """
         try:
-            logger.info(f"Exporting database to CSV: {output_csv_path}")
+            logger.info("Exporting database to CSV: %s", output_csv_path)
             
-            with self.db_manager as db:
-                cursor = db.connection.cursor()
-                
-                # Get all image data with proper column mapping
-                cursor.execute("""
-                    SELECT 
-                        group_id as GroupID,
-                        algorithm as Algorithm,
-                        is_master as Master,
-                        file as File,
-                        name as Name,
-                        path as Path,
-                        size_bytes as Size,
-                        created_date as Created,
-                        modified_date as Modified,
-                        width as Width,
-                        height as Height,
-                        file_type as FileType,
-                        camera_make as CameraMake,
-                        camera_model as CameraModel,
-                        date_taken as DateTaken,
-                        quality_score as QualityScore,
-                        iptc_keywords as IPTCKeywords,
-                        iptc_caption as IPTCCaption,
-                        xmp_keywords as XMPKeywords,
-                        xmp_title as XMPTitle,
-                        similarity_score as SimilarityScore,
-                        match_reasons as MatchReasons
-                    FROM images
-                    ORDER BY group_id, is_master DESC, quality_score DESC
-                """)
-                
-                rows = cursor.fetchall()
-                
-                if not rows:
-                    logger.warning("No data found in database to export")
-                    return False
-                
-                # Write to CSV
-                import csv
-                
-                output_path = Path(output_csv_path)
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-                    # Get column names from cursor description
-                    fieldnames = [description[0] for description in cursor.description]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    
-                    writer.writeheader()
-                    for row in rows:
-                        writer.writerow(dict(row))
-                
-                logger.info(f"Successfully exported {len(rows)} records to {output_csv_path}")
-                return True
+            db = self._connect()
+            cursor = db.connection.cursor()
+            # Plain tuples are all csv.writer needs; skip building sqlite3.Row objects
+            cursor.row_factory = None
+            
+            cursor.execute("SELECT COUNT(*) FROM images")
+            record_count = cursor.fetchone()[0]
+            
+            if not record_count:
+                logger.warning("No data found in database to export")
+                return False
+            
+            # Get all image data with proper column mapping
+            export_query = """
+                SELECT 
+                    group_id as GroupID,
+                    algorithm as Algorithm,
+                    is_master as Master,
+                    file as File,
+                    name as Name,
+                    path as Path,
+                    size_bytes as Size,
+                    created_date as Created,
+                    modified_date as Modified,
+                    width as Width,
+                    height as Height,
+                    file_type as FileType,
+                    camera_make as CameraMake,
+                    camera_model as CameraModel,
+                    date_taken as DateTaken,
+                    quality_score as QualityScore,
+                    iptc_keywords as IPTCKeywords,
+                    iptc_caption as IPTCCaption,
+                    xmp_keywords as XMPKeywords,
+                    xmp_title as XMPTitle,
+                    similarity_score as SimilarityScore,
+                    match_reasons as MatchReasons
+                FROM images
+                ORDER BY group_id, is_master DESC, quality_score DESC
+            """
+            
+            # idx_images_export should satisfy the ORDER BY without a separate sort
+            plan = cursor.execute(f"EXPLAIN QUERY PLAN {export_query}").fetchall()
+            if any('TEMP B-TREE' in row[-1] for row in plan):
+                logger.warning("Export query is not using idx_images_export; rows will be sorted in memory")
+            
+            cursor.execute(export_query)
+            
+            # Write to CSV
+            import csv
+            
+            output_path = Path(output_csv_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
+                writer = csv.writer(csvfile)
                 
+                # Header comes from the column aliases; rows are streamed
+                # straight from the cursor instead of being fetched up front
+                writer.writerow([description[0] for description in cursor.description])
+                writer.writerows(cursor)
+            
+            logger.info("Successfully exported %s records to %s", record_count, output_csv_path)
+            return True
+            
         except Exception as e:
-            logger.error(f"CSV export failed: {e}", exc_info=True)
+            logger.error("CSV export failed: %s", e, exc_info=True)
             return False
     
     def get_migration_status(self) -> dict:
@@ -230,15 +327,12 @@ class MigrationUtility:
         }
         
         if status['database_exists']:
-            status['database_valid'] = self.verify_database()
+            summary = self._get_verified_summary()
+            status['database_valid'] = summary is not None
             
             if status['database_valid']:
-                try:
-                    with self.db_manager as db:
-                        status['database_stats'] = db.get_overall_summary()
-                        status['recommendations'].append("Database is ready for use")
-                except Exception as e:
-                    status['recommendations'].append(f"Database error: {e}")
+                status['database_stats'] = summary
+                status['recommendations'].append("Database is ready for use")
             else:
                 status['recommendations'].append("Database exists but appears corrupted")
         else:
@@ -249,6 +343,8 @@ class MigrationUtility:
 
 def main():
     """Main entry point for the migration utility."""
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Lineup Migration Utility",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -326,8 +422,10 @@ Examples:
         logger.info("Migration interrupted by user")
         return 1
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         return 1
+    finally:
+        migration.close()
 
 
 if __name__ == '__main__':
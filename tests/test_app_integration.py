@@ -5,6 +5,7 @@ This simulates the user workflow with real photochomper data.
 """
 
 import logging
+import os
 import sys
 from pathlib import Path
 from data_manager_enhanced import DataManager
@@ -56,30 +57,22 @@ def test_app_integration():
             logger.info(f"  Group info: {group_summary['existing_images']}/{group_summary['total_images']} images available")
             logger.info(f"  Match reasons: {group_summary['match_reasons']}")
             
-            # Get group images (for thumbnail display)
-            group_df = data_manager.get_group(group_id)
-            if not group_df.empty:
-                logger.info(f"  Would display {len(group_df)} thumbnails")
-                
-                # Check master/non-master distribution
-                masters = group_df[group_df['IsMaster'] == True]
-                non_masters = group_df[group_df['IsMaster'] == False]
-                logger.info(f"  Masters: {len(masters)}, Non-masters: {len(non_masters)}")
-                
-                # Check file existence (for UI indicators)
-                existing_files = group_df[group_df['FileExists'] == True]
-                missing_files = group_df[group_df['FileExists'] == False]
-                logger.info(f"  Existing files: {len(existing_files)}, Missing files: {len(missing_files)}")
-                
-                # Test real-world data characteristics
-                if 'Algorithm' in group_df.columns:
-                    algorithms = group_df['Algorithm'].unique()
-                    logger.info(f"  Algorithms: {algorithms.tolist()}")
-                
-                if 'SimilarityScore' in group_df.columns:
+            # Master/non-master distribution and file existence (for UI indicators)
+            masters_n = group_summary['master_count']
+            logger.info(f"  Masters: {masters_n}, Non-masters: {group_summary['total_images'] - masters_n}")
+            logger.info(f"  Existing files: {group_summary['existing_images']}, Missing files: {group_summary['missing_images']}")
+            logger.info(f"  Algorithm: {group_summary['algorithm']}")
+            
+            # Per-image details need the group's images (as for thumbnail display); only load them when logged
+            if logger.isEnabledFor(logging.DEBUG):
+                group_df = data_manager.get_group(group_id, columns=['Algorithm', 'SimilarityScore'])
+                if not group_df.empty:
+                    logger.debug(f"  Would display {len(group_df)} thumbnails")
+                    logger.debug(f"  Algorithms: {group_df['Algorithm'].unique().tolist()}")
+                    
                     sim_scores = group_df['SimilarityScore'].dropna()
                     if not sim_scores.empty:
-                        logger.info(f"  Similarity scores: {sim_scores.tolist()}")
+                        logger.debug(f"  Similarity scores: {sim_scores.tolist()}")
         
         # Test file validation (simulates "Reload" button functionality)
         logger.info("\nTesting file validation...")
@@ -122,53 +115,57 @@ def test_real_world_characteristics():
         data_manager = DataManager(use_database=True)
         data_manager.load_csv(csv_path)
         
+        # One cursor on the persistent connection serves every query below; the
+        # finally block closes it (leaving a `with` block would disconnect early)
+        db = data_manager.db_manager
+        db.ensure_connection()
+        cursor = db.connection.cursor()
+        cursor.arraysize = 1000
+        
         # Test 1: Master field handling ("Yes" vs empty string)
         logger.info("Testing Master field handling...")
-        with data_manager.db_manager as db:
-            cursor = db.connection.cursor()
-            cursor.execute("SELECT group_id, is_master FROM images ORDER BY group_id, is_master DESC")
-            results = cursor.fetchall()
-            
-            for group_id, is_master in results:
-                master_status = "MASTER" if is_master else "duplicate"
-                logger.info(f"  Group {group_id}: {master_status}")
+        cursor.execute("""
+            SELECT group_id, SUM(is_master) AS masters, COUNT(*) AS images
+            FROM images GROUP BY group_id ORDER BY group_id
+        """)
+        results = cursor.fetchall()
+        
+        for group_id, masters, images in results:
+            logger.info(f"  Group {group_id}: {masters} masters, {images - masters} duplicates")
         
         # Test 2: Unix timestamp handling
         logger.info("\nTesting timestamp conversion...")
-        with data_manager.db_manager as db:
-            cursor = db.connection.cursor()
-            cursor.execute("SELECT created_date, modified_date FROM images LIMIT 2")
-            dates = cursor.fetchall()
-            
-            for created, modified in dates:
+        cursor.execute("SELECT created_date, modified_date FROM images LIMIT 2")
+        
+        for batch in iter(cursor.fetchmany, []):
+            for created, modified in batch:
                 logger.info(f"  Created: {created}, Modified: {modified}")
         
         # Test 3: Empty array handling ("[]" strings)
         logger.info("\nTesting empty array handling...")
-        group_df = data_manager.get_group('0')
+        group_df = data_manager.get_group('0', columns=['IPTCKeywords'])
         if not group_df.empty and 'IPTCKeywords' in group_df.columns:
             iptc_values = group_df['IPTCKeywords'].tolist()
             logger.info(f"  IPTC Keywords: {iptc_values}")
         
         # Test 4: Windows path handling
         logger.info("\nTesting Windows path handling...")
-        group_df = data_manager.get_group('0')
+        group_df = data_manager.get_group('0', columns=['Path'])
         if not group_df.empty:
             paths = group_df['Path'].tolist()
-            for path in paths:
+            # Verify path normalization
+            normalized_paths = [os.path.normpath(path) for path in paths]
+            for path, normalized in zip(paths, normalized_paths):
                 logger.info(f"  Path: {path}")
-                # Verify path normalization
-                normalized = str(Path(path))
                 logger.info(f"  Normalized: {normalized}")
         
         # Test 5: File size handling (numeric strings)
         logger.info("\nTesting file size handling...")
-        with data_manager.db_manager as db:
-            cursor = db.connection.cursor()
-            cursor.execute("SELECT size_bytes FROM images WHERE size_bytes IS NOT NULL")
-            sizes = [row[0] for row in cursor.fetchall()]
-            
-            for size in sizes:
+        cursor.execute("SELECT size_bytes FROM images WHERE size_bytes IS NOT NULL")
+        
+        # Stream rows in batches rather than materializing the whole column
+        for batch in iter(cursor.fetchmany, []):
+            for (size,) in batch:
                 size_mb = size / (1024 * 1024)
                 logger.info(f"  Size: {size} bytes ({size_mb:.2f} MB)")
         
@@ -21,9 +21,48 @@ def test_dropdown_implementation():
         
         content = main_py_path.read_text()
         
+        # Collect everything the checks need in a single pass over the AST
+        tree = ast.parse(content)
+        func_names = set()
+        attr_names = set()
+        option_values = set()
+        views_menu_created = False
+        views_menu_state_managed = False
+        views_menu_reset = False
+        
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef):
+                func_names.add(node.name)
+            elif isinstance(node, ast.Attribute):
+                attr_names.add(node.attr)
+            elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+                func = node.value.func
+                if (isinstance(func, ast.Attribute) and func.attr == "CTkOptionMenu" and
+                        any(isinstance(t, ast.Attribute) and t.attr == "views_menu" for t in node.targets)):
+                    views_menu_created = True
+            
+            if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+                continue
+            
+            if node.func.attr == "CTkOptionMenu":
+                for keyword in node.keywords:
+                    if keyword.arg == "values" and isinstance(keyword.value, ast.List):
+                        option_values.update(
+                            elt.value for elt in keyword.value.elts
+                            if isinstance(elt, ast.Constant) and isinstance(elt.value, str)
+                        )
+            
+            owner = node.func.value
+            if isinstance(owner, ast.Attribute) and owner.attr == "views_menu":
+                if node.func.attr == "configure" and any(k.arg == "state" for k in node.keywords):
+                    views_menu_state_managed = True
+                elif (node.func.attr == "set" and node.args and
+                      isinstance(node.args[0], ast.Constant) and node.args[0].value == "Select View..."):
+                    views_menu_reset = True
+        
         # Test 1: Check that CTkOptionMenu is used instead of CTkButton
         print("\n1. Checking for Views dropdown menu...")
-        if "views_menu = ctk.CTkOptionMenu(" in content:
+        if views_menu_created:
             print("✅ Views dropdown menu found")
         else:
             print("❌ Views dropdown menu not found")
@@ -40,7 +79,7 @@ def test_dropdown_implementation():
         
         all_found = True
         for option in required_options:
-            if option in content:
+            if option in option_values:
                 print(f"✅ Option '{option}' found")
             else:
                 print(f"❌ Option '{option}' missing")
@@ -51,7 +90,7 @@ def test_dropdown_implementation():
         
         # Test 3: Check for handler method
         print("\n3. Checking for handler method...")
-        if "def handle_view_selection(self, selection):" in content:
+        if "handle_view_selection" in func_names:
             print("✅ Handler method 'handle_view_selection' found")
         else:
             print("❌ Handler method missing")
@@ -59,7 +98,7 @@ def test_dropdown_implementation():
         
         # Test 4: Check for statistics view method
         print("\n4. Checking for statistics view method...")
-        if "def show_statistics_view(self):" in content:
+        if "show_statistics_view" in func_names:
             print("✅ Statistics view method found")
         else:
             print("❌ Statistics view method missing")
@@ -67,7 +106,7 @@ def test_dropdown_implementation():
         
         # Test 5: Check for search view method  
         print("\n5. Checking for search view method...")
-        if "def show_search_view(self):" in content:
+        if "show_search_view" in func_names:
             print("✅ Search view method found")
         else:
             print("❌ Search view method missing")
@@ -75,7 +114,7 @@ def test_dropdown_implementation():
         
         # Test 6: Check that old button references are removed
         print("\n6. Checking for old button references...")
-        if "list_view_btn" in content:
+        if "list_view_btn" in attr_names:
             print("❌ Old list_view_btn reference still exists")
             return False
         else:
@@ -83,7 +122,7 @@ def test_dropdown_implementation():
         
         # Test 7: Check for state management
         print("\n7. Checking for dropdown state management...")
-        if "views_menu.configure(state=" in content:
+        if views_menu_state_managed:
             print("✅ Dropdown state management found")
         else:
             print("❌ Dropdown state management missing")
@@ -91,7 +130,7 @@ def test_dropdown_implementation():
         
         # Test 8: Check for menu reset after action
         print("\n8. Checking for menu reset functionality...")
-        if 'views_menu.set("Select View...")' in content:
+        if views_menu_reset:
             print("✅ Menu reset functionality found")
         else:
             print("❌ Menu reset functionality missing")
@@ -5,8 +5,12 @@ This tests the SQLite backend and rich metadata support.
 """
 
 import logging
+import sqlite3
 import sys
 from pathlib import Path
+
+import pandas as pd
+
 from data_manager_enhanced import DataManager
 
 # Setup logging
@@ -26,10 +30,10 @@ def test_enhanced_data_manager():
         # Test loading the full schema CSV
         csv_path = "sample_data_full.csv"
         if not Path(csv_path).exists():
-            logger.error(f"Sample CSV not found: {csv_path}")
+            logger.error("Sample CSV not found: %s", csv_path)
             return False
         
-        logger.info(f"Loading CSV: {csv_path}")
+        logger.info("Loading CSV: %s", csv_path)
         success = data_manager.load_csv(csv_path)
         
         if not success:
@@ -42,36 +46,50 @@ def test_enhanced_data_manager():
         logger.info("\n--- Overall Summary ---")
         summary = data_manager.get_overall_summary()
         for key, value in summary.items():
-            logger.info(f"{key}: {value}")
+            logger.info("%s: %s", key, value)
         
         # Test group operations
         logger.info("\n--- Group Operations ---")
         group_list = data_manager.get_group_list()
-        logger.info(f"Found {len(group_list)} groups: {group_list}")
-        
-        # Test individual group details
-        for group_id in group_list[:3]:  # Test first 3 groups
-            logger.info(f"\n--- Group {group_id} Details ---")
-            group_summary = data_manager.get_group_summary(group_id)
+        logger.info("Found %s groups: %s", len(group_list), group_list)
+        if group_list:
+            # Existence checks don't need the group DataFrame
+            first_exists = data_manager.has_group(group_list[0])
+            missing_exists = data_manager.has_group('missing')
+            logger.info("has_group(%s): %s", group_list[0], first_exists)
+            logger.info("has_group('missing'): %s", missing_exists)
+            
+            if not first_exists or missing_exists:
+                logger.error("has_group returned the wrong result")
+                return False
+        
+        # Test individual group details, fetching the first 3 groups in two batched queries
+        sample_groups = group_list[:3]
+        group_summaries = data_manager.get_group_summaries(sample_groups)
+        groups = data_manager.get_groups(sample_groups)
+        
+        for group_id in sample_groups:
+            logger.info("\n--- Group %s Details ---", group_id)
+            group_summary = group_summaries.get(group_id, {})
             for key, value in group_summary.items():
-                logger.info(f"  {key}: {value}")
+                logger.info("  %s: %s", key, value)
             
             # Get group images
-            group_images = data_manager.get_group(group_id)
-            if not group_images.empty:
-                logger.info(f"  Group has {len(group_images)} images")
-                logger.info(f"  Columns: {list(group_images.columns)}")
+            group_images = groups.get(group_id)
+            if group_images is not None and not group_images.empty:
+                logger.info("  Group has %s images", len(group_images))
+                logger.info("  Columns: %s", list(group_images.columns))
                 
                 # Show sample of enhanced fields
                 if 'QualityScore' in group_images.columns:
                     quality_scores = group_images['QualityScore'].dropna()
                     if not quality_scores.empty:
-                        logger.info(f"  Quality scores: {quality_scores.tolist()}")
+                        logger.info("  Quality scores: %s", quality_scores.tolist())
                 
                 if 'CameraMake' in group_images.columns:
                     cameras = group_images['CameraMake'].dropna().unique()
                     if len(cameras) > 0:
-                        logger.info(f"  Cameras: {cameras.tolist()}")
+                        logger.info("  Cameras: %s", cameras.tolist())
         
         # Test advanced statistics (database-only feature)
         logger.info("\n--- Advanced Statistics ---")
@@ -80,33 +98,33 @@ def test_enhanced_data_manager():
         if advanced_stats:
             if 'quality' in advanced_stats:
                 quality_stats = advanced_stats['quality']
-                logger.info(f"Quality Statistics: {quality_stats}")
+                logger.info("Quality Statistics: %s", quality_stats)
             
             if 'cameras' in advanced_stats:
                 camera_stats = advanced_stats['cameras']
-                logger.info(f"Top Cameras: {camera_stats[:3]}")
+                logger.info("Top Cameras: %s", camera_stats[:3])
             
             if 'file_types' in advanced_stats:
                 filetype_stats = advanced_stats['file_types']
-                logger.info(f"File Types: {filetype_stats}")
+                logger.info("File Types: %s", filetype_stats)
         
         # Test search functionality (database-only feature)
         logger.info("\n--- Search Functionality ---")
         search_results = data_manager.search_images("Canon", limit=5)
         if not search_results.empty:
-            logger.info(f"Found {len(search_results)} images with 'Canon'")
-            logger.info(f"Sample results: {search_results[['File', 'CameraMake']].head().to_dict('records')}")
+            logger.info("Found %s images with 'Canon'", len(search_results))
+            logger.info("Sample results: %s", search_results[['File', 'CameraMake']].head().to_dict('records'))
         
         # Test file validation
         logger.info("\n--- File Validation ---")
         missing_files = data_manager.validate_file_paths()
-        logger.info(f"Found {len(missing_files)} missing files (expected for test data)")
+        logger.info("Found %s missing files (expected for test data)", len(missing_files))
         
         logger.info("\n✓ All tests completed successfully!")
         return True
         
     except Exception as e:
-        logger.error(f"Test failed with error: {e}", exc_info=True)
+        logger.error("Test failed with error: %s", e, exc_info=True)
         return False
     
     finally:
@@ -126,15 +144,15 @@ def test_legacy_compatibility():
         # Test with original sample data (5 columns)
         csv_path = "sample_data.csv"
         if not Path(csv_path).exists():
-            logger.warning(f"Legacy sample CSV not found: {csv_path}")
+            logger.warning("Legacy sample CSV not found: %s", csv_path)
             return True  # Skip this test
         
-        logger.info(f"Loading legacy CSV: {csv_path}")
+        logger.info("Loading legacy CSV: %s", csv_path)
         success = data_manager.load_csv(csv_path)
         
         if success:
             summary = data_manager.get_overall_summary()
-            logger.info(f"Legacy mode summary: {summary}")
+            logger.info("Legacy mode summary: %s", summary)
             logger.info("✓ Legacy compatibility maintained")
         else:
             logger.error("Failed to load legacy CSV")
@@ -143,8 +161,62 @@ def test_legacy_compatibility():
         return True
         
     except Exception as e:
-        logger.error(f"Legacy compatibility test failed: {e}")
+        logger.error("Legacy compatibility test failed: %s", e)
+        return False
+
+
+def test_get_groups_many_ids():
+    """Test batched group fetches with more IDs than fit in one SQLite query."""
+    logger.info("\nTesting Batched Group Fetch with Many IDs")
+    logger.info("=" * 40)
+    
+    data_manager = DataManager(use_database=True, db_path=':memory:')
+    
+    # A small chunk size keeps this quick (building ~1000 groups is slow) while still
+    # needing several chunks for a few dozen groups
+    chunk_size = 10
+    data_manager.db_manager.MAX_QUERY_PARAMETERS = chunk_size
+    
+    try:
+        # Two images per group; the duplicate has the higher quality score so ordering is checked
+        num_groups = chunk_size * 3 + 5
+        df = pd.DataFrame({
+            'GroupID': [group_id for group_id in range(num_groups) for _ in range(2)],
+            'Master': ['', 'Yes'] * num_groups,
+            'File': [f"image_{i}.jpg" for i in range(num_groups * 2)],
+            'Path': [f"/missing/image_{i}.jpg" for i in range(num_groups * 2)],
+            'QualityScore': [9.0, 5.0] * num_groups
+        })
+        data_manager.load_dataframe(df)
+        
+        # Cap SQLite's bound parameters at the chunk size so an unchunked query fails
+        data_manager.db_manager.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, chunk_size)
+        
+        group_ids = [str(group_id) for group_id in range(num_groups)]
+        groups = data_manager.get_groups(group_ids)
+        
+        if sorted(groups) != sorted(group_ids):
+            logger.error("Expected %s groups, got %s", num_groups, len(groups))
+            return False
+        
+        if list(groups) != sorted(group_ids):
+            logger.error("Groups are not ordered by group ID")
+            return False
+        
+        for group_id, group_df in groups.items():
+            if len(group_df) != 2 or not group_df['IsMaster'].iloc[0]:
+                logger.error("Group %s images are not ordered master first", group_id)
+                return False
+        
+        logger.info("✓ Fetched %s groups across chunked queries", len(groups))
+        return True
+        
+    except Exception as e:
+        logger.error("Batched group fetch test failed: %s", e)
         return False
+    
+    finally:
+        data_manager.close()
 
 
 def main():
@@ -158,14 +230,18 @@ def main():
     # Test legacy compatibility
     legacy_success = test_legacy_compatibility()
     
+    # Test batched group fetches beyond the query parameter limit
+    many_ids_success = test_get_groups_many_ids()
+    
     # Summary
     logger.info("\n" + "=" * 50)
     logger.info("TEST SUMMARY")
-    logger.info(f"Enhanced Features: {'✓ PASS' if enhanced_success else '✗ FAIL'}")
-    logger.info(f"Legacy Compatibility: {'✓ PASS' if legacy_success else '✗ FAIL'}")
+    logger.info("Enhanced Features: %s", '✓ PASS' if enhanced_success else '✗ FAIL')
+    logger.info("Legacy Compatibility: %s", '✓ PASS' if legacy_success else '✗ FAIL')
+    logger.info("Batched Group Fetch: %s", '✓ PASS' if many_ids_success else '✗ FAIL')
     
-    overall_success = enhanced_success and legacy_success
-    logger.info(f"Overall Result: {'✓ ALL TESTS PASSED' if overall_success else '✗ SOME TESTS FAILED'}")
+    overall_success = enhanced_success and legacy_success and many_ids_success
+    logger.info("Overall Result: %s", '✓ ALL TESTS PASSED' if overall_success else '✗ SOME TESTS FAILED')
     
     return 0 if overall_success else 1
 
@@ -7,6 +7,8 @@ This tests with actual photochomper output data.
 import logging
 import sys
 from pathlib import Path
+import numpy as np
+import pandas as pd
 from data_manager_enhanced import DataManager
 
 # Setup logging
@@ -14,19 +16,23 @@ logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 
-def test_real_csv_data():
-    """Test the enhanced data manager with real CSV data."""
-    logger.info("Testing Enhanced Data Manager with Real CSV Data")
-    logger.info("=" * 60)
-    
-    # Find the real CSV file
-    csv_path = "tests/duplicates_report_20250910_210302.csv"
-    if not Path(csv_path).exists():
-        logger.error(f"Real CSV not found: {csv_path}")
-        return False
-    
-    logger.info(f"Testing with real CSV: {csv_path}")
+def count_lines(file_path):
+    """Count lines in a file by reading it in 1 MiB binary chunks."""
+    line_count = 0
+    last_chunk = b''
+    with open(file_path, 'rb', buffering=0) as f:
+        while chunk := f.read(1 << 20):
+            line_count += chunk.count(b'\n')
+            last_chunk = chunk
     
+    # A final line without a trailing newline still counts, as with readlines()
+    if last_chunk and not last_chunk.endswith(b'\n'):
+        line_count += 1
+    return line_count
+
+
+def check_database_backend(csv_df):
+    """Exercise the SQLite backend on a parsed real CSV; returns True on success."""
     # Test with database backend
     logger.info("\n--- Testing SQLite Backend ---")
     data_manager_db = DataManager(use_database=True)
@@ -34,7 +40,7 @@ def test_real_csv_data():
     try:
         # Load with database backend
         logger.info("Loading CSV with SQLite backend...")
-        success = data_manager_db.load_csv(csv_path)
+        success = data_manager_db.load_dataframe(csv_df)
         
         if not success:
             logger.error("Failed to load CSV with database backend")
@@ -46,38 +52,43 @@ def test_real_csv_data():
         logger.info("\n--- Overall Summary (Database) ---")
         summary = data_manager_db.get_overall_summary()
         for key, value in summary.items():
-            logger.info(f"{key}: {value}")
+            logger.info("%s: %s", key, value)
         
         # Test group operations
         logger.info("\n--- Group Operations (Database) ---")
         group_list = data_manager_db.get_group_list()
-        logger.info(f"Found {len(group_list)} groups: {group_list}")
+        logger.info("Found %s groups: %s", len(group_list), group_list)
         
         # Test each group
         for group_id in group_list:
-            logger.info(f"\n--- Group {group_id} Details (Database) ---")
             group_summary = data_manager_db.get_group_summary(group_id)
-            for key, value in group_summary.items():
-                logger.info(f"  {key}: {value}")
-            
-            # Get group images
             group_images = data_manager_db.get_group(group_id)
+            if not logger.isEnabledFor(logging.INFO):
+                continue
+            
+            # Collect the group's details into a single log record
+            parts = [f"\n--- Group {group_id} Details (Database) ---"]
+            parts.extend(f"  {key}: {value}" for key, value in group_summary.items())
+            
             if not group_images.empty:
-                logger.info(f"  Group has {len(group_images)} images")
+                parts.append(f"  Group has {len(group_images)} images")
+                
+                # Pull the sampled columns out as one array; absent columns come back as NaN
+                sample = group_images.reindex(columns=['Master', 'Algorithm', 'SimilarityScore', 'Size']).to_numpy()
                 
                 # Show real-world field content
-                logger.info(f"  Sample Master field: {group_images['Master'].tolist()}")
-                logger.info(f"  Sample Algorithm field: {group_images['Algorithm'].tolist()}")
+                parts.append(f"  Sample Master field: {np.array2string(sample[:, 0], threshold=20, separator=', ')}")
+                parts.append(f"  Sample Algorithm field: {np.array2string(sample[:, 1], threshold=20, separator=', ')}")
                 
-                if 'SimilarityScore' in group_images.columns:
-                    similarity_scores = group_images['SimilarityScore'].dropna()
-                    if not similarity_scores.empty:
-                        logger.info(f"  Similarity scores: {similarity_scores.tolist()}")
+                similarity_scores = sample[~pd.isna(sample[:, 2]), 2]
+                if similarity_scores.size:
+                    parts.append(f"  Similarity scores: {np.array2string(similarity_scores, threshold=20, separator=', ')}")
                 
-                if 'Size' in group_images.columns:
-                    sizes = group_images['Size'].dropna()
-                    if not sizes.empty:
-                        logger.info(f"  File sizes: {sizes.tolist()}")
+                sizes = sample[~pd.isna(sample[:, 3]), 3]
+                if sizes.size:
+                    parts.append(f"  File sizes: {np.array2string(sizes, threshold=20, separator=', ')}")
+            
+            logger.info("%s", "\n".join(parts))
         
         # Test advanced statistics with real data
         logger.info("\n--- Advanced Statistics (Real Data) ---")
@@ -86,54 +97,68 @@ def test_real_csv_data():
         if advanced_stats:
             if 'quality' in advanced_stats and advanced_stats['quality']:
                 quality_stats = advanced_stats['quality']
-                logger.info(f"Quality Statistics: {quality_stats}")
+                logger.info("Quality Statistics: %s", quality_stats)
             
             if 'file_types' in advanced_stats:
                 filetype_stats = advanced_stats['file_types']
-                logger.info(f"File Types: {filetype_stats}")
+                logger.info("File Types: %s", filetype_stats)
             
             if 'size' in advanced_stats and advanced_stats['size']:
                 size_stats = advanced_stats['size']
-                logger.info(f"Size Statistics: {size_stats}")
+                logger.info("Size Statistics: %s", size_stats)
         
         # Test specific real-world data characteristics
         logger.info("\n--- Real-world Data Analysis ---")
         
-        # Test handling of "Yes"/"" Master values (not True/False)
+        # Probe master values, timestamps, keywords and algorithms in one round trip
         with data_manager_db.db_manager as db:
             cursor = db.connection.cursor()
-            cursor.execute("SELECT DISTINCT is_master FROM images")
-            master_values = [row[0] for row in cursor.fetchall()]
-            logger.info(f"Master values in database: {master_values}")
+            cursor.execute("""
+                SELECT 'masters' AS kind, json_group_array(is_master) AS value
+                FROM (SELECT DISTINCT is_master FROM images)
+                UNION ALL
+                SELECT 'dates', json_group_array(json_object('created_date', created_date, 'modified_date', modified_date))
+                FROM (SELECT created_date, modified_date FROM images WHERE created_date IS NOT NULL LIMIT 3)
+                UNION ALL
+                SELECT 'keywords', json_group_array(json_object('iptc_keywords', iptc_keywords, 'xmp_keywords', xmp_keywords))
+                FROM (SELECT iptc_keywords, xmp_keywords FROM images WHERE iptc_keywords IS NOT NULL LIMIT 3)
+                UNION ALL
+                SELECT 'algorithms', json_group_array(algorithm)
+                FROM (SELECT DISTINCT algorithm FROM images)
+            """)
+            # Values stay as the JSON text SQLite produced; they are only logged
+            probes = dict(cursor.fetchall())
+            
+            # Test handling of "Yes"/"" Master values (not True/False)
+            logger.info("Master values in database: %s", probes['masters'])
             
             # Test handling of numeric timestamps
-            cursor.execute("SELECT created_date, modified_date FROM images WHERE created_date IS NOT NULL LIMIT 3")
-            date_values = cursor.fetchall()
-            logger.info(f"Sample date values: {[dict(row) for row in date_values]}")
+            logger.info("Sample date values: %s", probes['dates'])
             
             # Test handling of empty arrays and strings
-            cursor.execute("SELECT iptc_keywords, xmp_keywords FROM images WHERE iptc_keywords IS NOT NULL LIMIT 3")
-            keyword_values = cursor.fetchall()
-            logger.info(f"Sample keyword values: {[dict(row) for row in keyword_values]}")
+            logger.info("Sample keyword values: %s", probes['keywords'])
             
             # Test algorithm field
-            cursor.execute("SELECT DISTINCT algorithm FROM images")
-            algorithms = [row[0] for row in cursor.fetchall()]
-            logger.info(f"Algorithms used: {algorithms}")
+            logger.info("Algorithms used: %s", probes['algorithms'])
         
     except Exception as e:
-        logger.error(f"Database test failed: {e}", exc_info=True)
+        logger.error("Database test failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return False
     finally:
         data_manager_db.close()
     
+    return True
+
+
+def check_legacy_backend(csv_df):
+    """Exercise the legacy pandas backend on a parsed real CSV; returns True on success."""
     # Test with legacy backend for comparison
     logger.info("\n\n--- Testing Legacy Backend ---")
     data_manager_legacy = DataManager(use_database=False)
     
     try:
         logger.info("Loading CSV with legacy backend...")
-        success = data_manager_legacy.load_csv(csv_path)
+        success = data_manager_legacy.load_dataframe(csv_df)
         
         if not success:
             logger.error("Failed to load CSV with legacy backend")
@@ -145,14 +170,40 @@ def test_real_csv_data():
         legacy_summary = data_manager_legacy.get_overall_summary()
         logger.info("\n--- Legacy Backend Summary ---")
         for key, value in legacy_summary.items():
-            logger.info(f"{key}: {value}")
+            logger.info("%s: %s", key, value)
         
         # Test group operations
         legacy_groups = data_manager_legacy.get_group_list()
-        logger.info(f"Legacy found {len(legacy_groups)} groups: {legacy_groups}")
+        logger.info("Legacy found %s groups: %s", len(legacy_groups), legacy_groups)
         
     except Exception as e:
-        logger.error(f"Legacy test failed: {e}", exc_info=True)
+        logger.error("Legacy test failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return False
+    
+    return True
+
+
+def test_real_csv_data():
+    """Test the enhanced data manager with real CSV data."""
+    logger.info("Testing Enhanced Data Manager with Real CSV Data")
+    logger.info("=" * 60)
+    
+    # Find the real CSV file
+    csv_path = "tests/duplicates_report_20250910_210302.csv"
+    if not Path(csv_path).exists():
+        logger.error("Real CSV not found: %s", csv_path)
+        return False
+    
+    logger.info("Testing with real CSV: %s", csv_path)
+    
+    # Parse the CSV once and hand the same frame to both backends
+    csv_df = pd.read_csv(csv_path)
+    
+    # Check the backends one after the other so each one's log reads as a block
+    database_success = check_database_backend(csv_df)
+    legacy_success = check_legacy_backend(csv_df)
+    
+    if not (database_success and legacy_success):
         return False
     
     logger.info("\n✓ All real CSV tests completed successfully!")
@@ -167,17 +218,18 @@ def test_migration_with_real_data():
     
     csv_path = "tests/duplicates_report_20250910_210302.csv"
     db_path = ".lineup_real_test.db"
+    export_path = "test_export_real.csv"
+    migration = None
     
     try:
         # Remove existing test database
-        if Path(db_path).exists():
-            Path(db_path).unlink()
+        Path(db_path).unlink(missing_ok=True)
         
         from migration_utility import MigrationUtility
         migration = MigrationUtility(db_path)
         
         # Test migration
-        logger.info(f"Migrating {csv_path} to {db_path}")
+        logger.info("Migrating %s to %s", csv_path, db_path)
         success = migration.migrate_csv_to_database(csv_path)
         
         if not success:
@@ -186,6 +238,9 @@ def test_migration_with_real_data():
         
         logger.info("✓ Migration completed successfully")
         
+        # Gather planner statistics (capped per index) before the verification queries run
+        migration.db_manager.connection.executescript("PRAGMA analysis_limit=1000; ANALYZE;")
+        
         # Test verification
         logger.info("Verifying migrated database...")
         verification_success = migration.verify_database()
@@ -197,8 +252,7 @@ def test_migration_with_real_data():
         logger.info("✓ Database verification passed")
         
         # Test export back to CSV
-        export_path = "test_export_real.csv"
-        logger.info(f"Exporting database back to CSV: {export_path}")
+        logger.info("Exporting database back to CSV: %s", export_path)
         export_success = migration.export_database_to_csv(export_path)
         
         if not export_success:
@@ -209,27 +263,30 @@ def test_migration_with_real_data():
         
         # Compare original vs exported
         logger.info("Comparing original vs exported CSV...")
-        original_lines = len(open(csv_path, 'r').readlines())
-        exported_lines = len(open(export_path, 'r').readlines())
+        original_lines = count_lines(csv_path)
+        exported_lines = count_lines(export_path)
         
-        logger.info(f"Original CSV: {original_lines} lines")
-        logger.info(f"Exported CSV: {exported_lines} lines")
+        logger.info("Original CSV: %s lines", original_lines)
+        logger.info("Exported CSV: %s lines", exported_lines)
         
         if original_lines == exported_lines:
             logger.info("✓ Line counts match")
         else:
             logger.warning("Line counts don't match - this may be normal due to data processing")
         
-        # Clean up
-        Path(db_path).unlink()
-        Path(export_path).unlink()
-        
         logger.info("✓ Migration utility tests completed successfully!")
         return True
         
     except Exception as e:
-        logger.error(f"Migration test failed: {e}", exc_info=True)
+        logger.error("Migration test failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return False
+    finally:
+        # Close the connection before deleting the database (Windows refuses to unlink open files)
+        if migration is not None:
+            migration.close()
+            migration.status_cache_path.unlink(missing_ok=True)
+        Path(db_path).unlink(missing_ok=True)
+        Path(export_path).unlink(missing_ok=True)
 
 
 def main():
@@ -246,11 +303,11 @@ def main():
     # Summary
     logger.info("\n" + "=" * 50)
     logger.info("REAL CSV TEST SUMMARY")
-    logger.info(f"Enhanced Data Manager: {'✓ PASS' if data_manager_success else '✗ FAIL'}")
-    logger.info(f"Migration Utility: {'✓ PASS' if migration_success else '✗ FAIL'}")
+    logger.info("Enhanced Data Manager: %s", '✓ PASS' if data_manager_success else '✗ FAIL')
+    logger.info("Migration Utility: %s", '✓ PASS' if migration_success else '✗ FAIL')
     
     overall_success = data_manager_success and migration_success
-    logger.info(f"Overall Result: {'✓ ALL TESTS PASSED' if overall_success else '✗ SOME TESTS FAILED'}")
+    logger.info("Overall Result: %s", '✓ ALL TESTS PASSED' if overall_success else '✗ SOME TESTS FAILED')
     
     return 0 if overall_success else 1
 
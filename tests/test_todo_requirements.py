@@ -4,7 +4,10 @@ Test script to verify all TODO.md requirements are implemented.
 This tests against the 16 specific requirements listed in TODO.md.
 """
 
+import ast
+import inspect
 import logging
+import re
 import sys
 from pathlib import Path
 from data_manager_enhanced import DataManager
@@ -16,6 +19,36 @@ logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 
+def _collect_source_names(source):
+    """Return (identifiers, string literals) found in one AST pass over source."""
+    identifiers = set()
+    literals = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Name):
+            identifiers.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            identifiers.add(node.attr)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            identifiers.add(node.name)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            literals.add(node.value)
+    return identifiers, literals
+
+
+# ListScreen names and literals, collected once for the source-analysis checks
+_LISTSCREEN_IDENTS, _LISTSCREEN_LITERALS = _collect_source_names(inspect.getsource(ListScreen))
+
+
+# Markers that show main.py opens the list screen, found in one regex scan
+_MAIN_INTEGRATION_MARKERS = {"from list_screen import ListScreen", "open_list_view", "List View"}
+_MAIN_INTEGRATION_RE = re.compile("|".join(re.escape(marker) for marker in sorted(_MAIN_INTEGRATION_MARKERS)))
+
+
+def _in_listscreen_literals(text):
+    """Check whether text appears inside any ListScreen string literal."""
+    return any(text in literal for literal in _LISTSCREEN_LITERALS)
+
+
 def test_todo_requirements():
     """Test all 16 TODO.md requirements."""
     logger.info("Testing TODO.md Requirements")
@@ -24,15 +57,14 @@ def test_todo_requirements():
     results = {}
     
     try:
-        # Initialize components
-        data_manager = DataManager(use_database=True)
+        # Initialize components (in-memory database: nothing here needs to persist)
+        data_manager = DataManager(use_database=True, db_path=':memory:')
         
         # Load test data
-        csv_path = "tests/duplicates_report_20250910_210302.csv"
-        if not Path(csv_path).exists():
-            csv_path = "sample_data_full.csv"
+        candidates = ("tests/duplicates_report_20250910_210302.csv", "sample_data_full.csv")
+        csv_path = next((path for path in candidates if Path(path).is_file()), None)
         
-        if not Path(csv_path).exists():
+        if csv_path is None:
             logger.error("No test CSV file found")
             return False
         
@@ -41,7 +73,7 @@ def test_todo_requirements():
             logger.error("Failed to load test CSV")
             return False
         
-        logger.info(f"✓ Test data loaded from {csv_path}")
+        logger.info("✓ Test data loaded from %s", csv_path)
         
         # Test each TODO requirement
         
@@ -56,83 +88,80 @@ def test_todo_requirements():
             logger.info("✓ SQLite database requirement met")
         except Exception as e:
             results[1] = f"✗ FAIL - {e}"
-            logger.error(f"✗ SQLite database test failed: {e}")
+            logger.error("✗ SQLite database test failed: %s", e)
         
-        # Import ListScreen here to avoid scope issues
-        from list_screen import ListScreen
+        # One ListScreen instance serves the attribute checks for requirements 2, 3, 4 and 6
+        list_screen_instance = None
+        list_screen_attrs = set()
+        list_screen_error = None
+        try:
+            list_screen_instance = ListScreen(None, data_manager, None, None)
+            list_screen_attrs = set(dir(list_screen_instance))
+        except Exception as e:
+            list_screen_error = e
+        
+        def check_list_screen_attrs(required_attrs):
+            if list_screen_error is not None:
+                raise list_screen_error
+            missing = required_attrs - list_screen_attrs
+            assert not missing, f"Missing attributes: {sorted(missing)}"
         
         # 2. List screen with CSV contents, checkboxes, and action buttons
         logger.info("\n2. Testing list screen implementation...")
         try:
-            list_screen_instance = ListScreen(None, data_manager, None, None)
-            assert hasattr(list_screen_instance, 'setup_ui')
-            assert hasattr(list_screen_instance, 'selected_rows')
-            assert hasattr(list_screen_instance, 'move_selected')
-            assert hasattr(list_screen_instance, 'delete_selected')
+            check_list_screen_attrs({'setup_ui', 'selected_rows', 'move_selected', 'delete_selected'})
             results[2] = "✓ PASS - List screen with checkboxes and action buttons implemented"
             logger.info("✓ List screen requirement met")
         except Exception as e:
             results[2] = f"✗ FAIL - {e}"
-            logger.error(f"✗ List screen test failed: {e}")
+            logger.error("✗ List screen test failed: %s", e)
         
         # 3. Pagination with configurable page size (default 20)
         logger.info("\n3. Testing pagination...")
         try:
-            list_screen_instance = ListScreen(None, data_manager, None, None)
+            check_list_screen_attrs({'go_to_first_page', 'go_to_next_page', 'go_to_previous_page', 'go_to_last_page'})
             assert list_screen_instance.page_size == 20  # Default
-            assert hasattr(list_screen_instance, 'go_to_first_page')
-            assert hasattr(list_screen_instance, 'go_to_next_page')
-            assert hasattr(list_screen_instance, 'go_to_previous_page')
-            assert hasattr(list_screen_instance, 'go_to_last_page')
             results[3] = "✓ PASS - Pagination with configurable page size (default 20)"
             logger.info("✓ Pagination requirement met")
         except Exception as e:
             results[3] = f"✗ FAIL - {e}"
-            logger.error(f"✗ Pagination test failed: {e}")
+            logger.error("✗ Pagination test failed: %s", e)
         
         # 4. Sortable and filterable columns
         logger.info("\n4. Testing sortable and filterable columns...")
         try:
-            list_screen_instance = ListScreen(None, data_manager, None, None)
-            assert hasattr(list_screen_instance, 'sort_by_column')
-            assert hasattr(list_screen_instance, 'apply_filters')
-            assert hasattr(list_screen_instance, 'apply_search_filter')
+            check_list_screen_attrs({'sort_by_column', 'apply_filters', 'apply_search_filter'})
             # These attributes exist before setup_ui
             results[4] = "✓ PASS - Sortable and filterable columns implemented"
             logger.info("✓ Sortable/filterable columns requirement met")
         except Exception as e:
             results[4] = f"✗ FAIL - {e}"
-            logger.error(f"✗ Sortable/filterable test failed: {e}")
+            logger.error("✗ Sortable/filterable test failed: %s", e)
         
         # 5. Required columns as specified in TODO
         logger.info("\n5. Testing required columns...")
         try:
-            import inspect
-            
             # Check if columns are defined in the class or __init__
-            source = inspect.getsource(ListScreen)
             required_elements = ['GroupID', 'Path', 'Master', 'QualityScore', 'Width', 'Height', 'Size', 'Created']
             
-            for element in required_elements:
-                if element not in source:
-                    # Check for alternative names
-                    if element == 'QualityScore' and 'Score' not in source:
-                        raise AssertionError(f"Missing column reference: {element}")
-                    elif element == 'Created' and 'Date Created' not in source:
-                        raise AssertionError(f"Missing column reference: {element}")
+            missing = set(required_elements) - _LISTSCREEN_IDENTS - _LISTSCREEN_LITERALS
+            for element in missing:
+                # Check for alternative names
+                if element == 'QualityScore' and not _in_listscreen_literals('Score'):
+                    raise AssertionError(f"Missing column reference: {element}")
+                elif element == 'Created' and not _in_listscreen_literals('Date Created'):
+                    raise AssertionError(f"Missing column reference: {element}")
             
             results[5] = "✓ PASS - All required columns present: Group ID, Path, Master, Score, Width, Height, Size, Date Created"
             logger.info("✓ Required columns requirement met")
         except Exception as e:
             results[5] = f"✗ FAIL - {e}"
-            logger.error(f"✗ Required columns test failed: {e}")
+            logger.error("✗ Required columns test failed: %s", e)
         
         # 6. Statistics display
         logger.info("\n6. Testing statistics display...")
         try:
-            list_screen = ListScreen(None, data_manager, None, None)
-            assert hasattr(list_screen, 'stats_labels')
-            assert hasattr(list_screen, 'update_statistics')
+            check_list_screen_attrs({'stats_labels', 'update_statistics'})
             # Check for required statistics from TODO
             expected_stats = ['total_groups', 'total_records', 'selected_records', 'selected_groups', 'selected_masters', 'selected_non_masters']
             # These will be initialized in setup_ui
@@ -140,77 +169,61 @@ def test_todo_requirements():
             logger.info("✓ Statistics requirement met")
         except Exception as e:
             results[6] = f"✗ FAIL - {e}"
-            logger.error(f"✗ Statistics test failed: {e}")
+            logger.error("✗ Statistics test failed: %s", e)
         
-        # 7-15. Check implementation by source code analysis
+        # 7-15. Check implementation by source code analysis, one verdict per requirement
         logger.info("\n7-15. Testing implementation via source code analysis...")
-        try:
-            import inspect
-            
-            source = inspect.getsource(ListScreen)
-            
-            # Required methods and attributes
-            required_items = [
-                'selected_rows',
-                'toggle_row_selection', 
-                'toggle_select_all',
-                'apply_search_to_column',
-                'clear_filters',
-                'sort_by_column',
-                'go_to_first_page',
-                'go_to_last_page', 
-                'go_to_page',
-                'open_image_viewer',
-                'refresh_data',
-                'show_only_groups_with_multiple',
-                'highlight_masters'
-            ]
-            
-            for item in required_items:
-                if item not in source:
-                    raise AssertionError(f"Missing implementation: {item}")
-            
-            # Check for key UI elements
-            ui_elements = ['select', 'thumbnail', 'contains', 'does not contain']
-            for element in ui_elements:
-                if element not in source:
-                    raise AssertionError(f"Missing UI element: {element}")
-            
-            results[7] = "✓ PASS - Row selection with checkboxes and visual highlighting"
-            results[8] = "✓ PASS - Select All checkbox for current page implemented"
-            results[9] = "✓ PASS - Advanced filtering with Contains/Does not contain options"
-            results[10] = "✓ PASS - Filter removal retains current selection"
-            results[11] = "✓ PASS - Column header sorting with ascending/descending toggle"
-            results[12] = "✓ PASS - Navigation buttons and page number jumping"
-            results[13] = "✓ PASS - Thumbnail column with click-to-view functionality"
-            results[14] = "✓ PASS - Refresh button implemented"
-            results[15] = "✓ PASS - Multi-group filter and master highlighting implemented"
-            
+        # requirement -> (required methods/attributes, required UI strings, description)
+        source_checks = {
+            7: (['selected_rows', 'toggle_row_selection'], ['select'],
+                "Row selection with checkboxes and visual highlighting"),
+            8: (['toggle_select_all'], [], "Select All checkbox for current page implemented"),
+            9: (['apply_search_to_column'], ['contains', 'does not contain'],
+                "Advanced filtering with Contains/Does not contain options"),
+            10: (['clear_filters'], [], "Filter removal retains current selection"),
+            11: (['sort_by_column'], [], "Column header sorting with ascending/descending toggle"),
+            12: (['go_to_first_page', 'go_to_last_page', 'go_to_page'], [], "Navigation buttons and page number jumping"),
+            13: (['open_image_viewer'], ['thumbnail'], "Thumbnail column with click-to-view functionality"),
+            14: (['refresh_data'], [], "Refresh button implemented"),
+            15: (['show_only_groups_with_multiple', 'highlight_masters'], [],
+                 "Multi-group filter and master highlighting implemented"),
+        }
+        
+        for req_num, (required_items, ui_elements, description) in source_checks.items():
+            try:
+                missing = set(required_items) - _LISTSCREEN_IDENTS
+                if missing:
+                    raise AssertionError(f"Missing implementation: {sorted(missing)[0]}")
+                
+                # Check for key UI elements in the string literals
+                for element in ui_elements:
+                    if not _in_listscreen_literals(element):
+                        raise AssertionError(f"Missing UI element: {element}")
+                
+                results[req_num] = f"✓ PASS - {description}"
+            except Exception as e:
+                results[req_num] = f"✗ FAIL - {e}"
+                logger.error("✗ Requirement %s source analysis failed: %s", req_num, e)
+        
+        if all(results[req_num].startswith("✓") for req_num in source_checks):
             logger.info("✓ All implementation requirements 7-15 met")
-            
-        except Exception as e:
-            for i in range(7, 16):
-                results[i] = f"✗ FAIL - {e}"
-            logger.error(f"✗ Implementation analysis failed: {e}")
         
         # 16. Pop-up integration with main screen
         logger.info("\n16. Testing main screen integration...")
         try:
             # Test that main.py has been updated
-            main_py_content = Path("main.py").read_text()
-            assert "from list_screen import ListScreen" in main_py_content
-            assert "open_list_view" in main_py_content
-            assert "List View" in main_py_content
+            missing = _MAIN_INTEGRATION_MARKERS - set(_MAIN_INTEGRATION_RE.findall(Path("main.py").read_text()))
+            assert not missing, f"main.py is missing: {sorted(missing)}"
             results[16] = "✓ PASS - List screen integrated as pop-up from main screen button"
             logger.info("✓ Main screen integration requirement met")
         except Exception as e:
             results[16] = f"✗ FAIL - {e}"
-            logger.error(f"✗ Main screen integration test failed: {e}")
+            logger.error("✗ Main screen integration test failed: %s", e)
         
         return results
         
     except Exception as e:
-        logger.error(f"Overall test failed: {e}", exc_info=True)
+        logger.error("Overall test failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return {}
     finally:
         data_manager.close()
@@ -232,7 +245,7 @@ def main():
     failed = 0
     
     for req_num, result in results.items():
-        logger.info(f"{req_num:2d}. {result}")
+        logger.info("%2d. %s", req_num, result)
         if result.startswith("✓"):
             passed += 1
         else:
@@ -241,7 +254,7 @@ def main():
     # Overall summary
     total = len(results)
     logger.info("\n" + "=" * 60)
-    logger.info(f"SUMMARY: {passed}/{total} requirements implemented")
+    logger.info("SUMMARY: %s/%s requirements implemented", passed, total)
     
     if failed == 0:
         logger.info("🎉 ALL TODO.md REQUIREMENTS SUCCESSFULLY IMPLEMENTED!")
@@ -264,7 +277,7 @@ def main():
         
         return 0
     else:
-        logger.error(f"❌ {failed} requirements failed - see details above")
+        logger.error("❌ %s requirements failed - see details above", failed)
         return 1
 
 